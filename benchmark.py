@@ -0,0 +1,358 @@
+import argparse
+import asyncio
+import csv
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+FIELDS = ("case", "size", "workers", "param", "repeat",
+          "median", "p95", "speedup", "efficiency")
+
+
+def load_module(name: str, path: str):
+    # lab2 and lab3 both ship a sle_solver_var1 module, so they are loaded
+    # under distinct names instead of through sys.path.
+    sys.path.insert(0, os.path.dirname(path))
+    try:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        # Registered so that process pools can unpickle its functions.
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.pop(0)
+    return module
+
+
+def measure(func, repeat: int, warmup: int) -> list[float]:
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start_time)
+    return timings
+
+
+def make_record(
+    case: str,
+    size: int,
+    workers: int,
+    param: str,
+    timings: list[float],
+) -> dict:
+    return {
+        "case": case,
+        "size": size,
+        "workers": workers,
+        "param": param,
+        "repeat": len(timings),
+        "median": float(np.median(timings)),
+        "p95": float(np.percentile(timings, 95)),
+    }
+
+
+def add_speedup(records: list[dict]) -> None:
+    # The baseline of every (case, size, param) series is its run with the
+    # fewest workers, so efficiency stays meaningful without a 1-worker run.
+    baselines: dict[tuple, dict] = {}
+    for record in records:
+        key = (record["case"], record["size"], record["param"])
+        if (key not in baselines or
+                record["workers"] < baselines[key]["workers"]):
+            baselines[key] = record
+
+    for record in records:
+        baseline = baselines[
+            (record["case"], record["size"], record["param"])]
+        speedup = baseline["median"] / record["median"]
+        record["speedup"] = speedup
+        record["efficiency"] = \
+            speedup * baseline["workers"] / record["workers"]
+
+
+def bench_lab1(args, rng: np.random.Generator) -> list[dict]:
+    lab1 = load_module("lab1", os.path.join(ROOT, "lab1", "lab1.py"))
+
+    records = []
+    for size in args.sizes:
+        left_matrix = rng.integers(0, 10, (size, size), dtype=np.int64)
+        right_matrix = rng.integers(0, 10, (size, size), dtype=np.int64)
+        expected = np.dot(left_matrix, right_matrix)
+
+        modes = ("tiled", "reference") + \
+            (("openmp",) if lab1.OpenMP_funcs is not None else ())
+        for mode in modes:
+            if mode == "reference" and size > args.reference_limit:
+                continue
+            assert np.array_equal(
+                expected, lab1.dot_matrices(left_matrix, right_matrix, mode))
+            records.append(make_record(
+                "lab1.dot_matrices", size, 1, f"mode={mode}",
+                measure(lambda: lab1.dot_matrices(
+                    left_matrix, right_matrix, mode),
+                    args.repeat, args.warmup)))
+
+        for backend in args.backends:
+            for workers in args.workers:
+                for split_size in args.split_sizes:
+                    def run():
+                        return asyncio.run(lab1.dot_matrices_parallel(
+                            left_matrix, right_matrix, split_size,
+                            backend, workers))
+
+                    assert np.array_equal(expected, run())
+                    records.append(make_record(
+                        f"lab1.dot_matrices_parallel[{backend}]", size,
+                        workers, f"split_size={split_size}",
+                        measure(run, args.repeat, args.warmup)))
+
+                for cutoff in args.strassen_cutoffs:
+                    def run():
+                        return asyncio.run(lab1.dot_matrices_parallel(
+                            left_matrix, right_matrix, backend=backend,
+                            max_workers=workers, algorithm="strassen",
+                            cutoff=cutoff))
+
+                    assert np.array_equal(expected, run())
+                    records.append(make_record(
+                        f"lab1.dot_matrices_parallel[{backend}]", size,
+                        workers, f"algorithm=strassen,cutoff={cutoff}",
+                        measure(run, args.repeat, args.warmup)))
+    return records
+
+
+def bench_lab1_strassen(args, rng: np.random.Generator) -> list[dict]:
+    # Classic against Strassen on one thread, over sizes large enough for
+    # the recursion to pay off; strassen_crossover reads the result.
+    lab1 = load_module("lab1", os.path.join(ROOT, "lab1", "lab1.py"))
+
+    records = []
+    for size in args.strassen_sizes:
+        left_matrix = rng.integers(0, 10, (size, size), dtype=np.int64)
+        right_matrix = rng.integers(0, 10, (size, size), dtype=np.int64)
+        expected = np.dot(left_matrix, right_matrix)
+
+        # Up to the cutoff Strassen is the classic kernel itself.
+        runs = [("algorithm=classic", "classic", lab1.STRASSEN_CUTOFF)] + [
+            (f"algorithm=strassen,cutoff={cutoff}", "strassen", cutoff)
+            for cutoff in args.strassen_cutoffs if cutoff < size]
+        for param, algorithm, cutoff in runs:
+            def run():
+                return lab1.dot_matrices(left_matrix, right_matrix,
+                                         algorithm=algorithm, cutoff=cutoff)
+
+            assert np.array_equal(expected, run())
+            records.append(make_record(
+                "lab1.dot_matrices[strassen_sweep]", size, 1, param,
+                measure(run, args.repeat, args.warmup)))
+    return records
+
+
+def strassen_crossover(records: list[dict]) -> dict[str, int | None]:
+    # The smallest swept size from which Strassen beats the classic
+    # product at every larger size, per cutoff; None if it never does.
+    classic = {record["size"]: record["median"] for record in records
+               if record["case"] == "lab1.dot_matrices[strassen_sweep]" and
+               record["param"] == "algorithm=classic"}
+
+    crossover = {}
+    for param in dict.fromkeys(
+            record["param"] for record in records
+            if record["case"] == "lab1.dot_matrices[strassen_sweep]" and
+            record["param"] != "algorithm=classic"):
+        wins = [(record["size"], record["median"] < classic[record["size"]])
+                for record in records
+                if record["case"] == "lab1.dot_matrices[strassen_sweep]" and
+                record["param"] == param]
+        crossover[param] = None
+        for size, win in sorted(wins, reverse=True):
+            if not win:
+                break
+            crossover[param] = size
+    return crossover
+
+
+def bench_lab2_rank(args) -> None:
+    # Runs inside every rank of an ``mpiexec`` job started by bench_lab2.
+    lab2 = load_module(
+        "lab2_sle_solver", os.path.join(ROOT, "lab2", "sle_solver_var1.py"))
+
+    if lab2.worker != 0:
+        lab2.mpi_worker_loop()
+        return
+
+    rng = np.random.default_rng(args.seed)
+    matrix_a = np.matrix(rng.random((args.size, args.size)))
+    vector_x = rng.random((args.size, 1))
+
+    # A is scattered once, so the timings cover the matvec over the
+    # distributed rows and not the setup of every call.
+    distributed_a = lab2.mpi_scatter_matrix(matrix_a)
+    assert np.allclose(lab2.mpi_matrix_dot(distributed_a, vector_x),
+                       np.dot(matrix_a, vector_x))
+    timings = measure(lambda: lab2.mpi_matrix_dot(distributed_a, vector_x),
+                      args.repeat, args.warmup)
+
+    lab2.mpi_free_matrix(distributed_a)
+    lab2.mpi_stop_workers()
+    print(json.dumps(timings))
+
+
+def bench_lab2(args) -> list[dict]:
+    records = []
+    for size in args.sizes:
+        for workers in args.workers:
+            command = [
+                *args.mpiexec.split(), "-n", str(workers),
+                sys.executable, os.path.abspath(__file__), "--mpi-rank",
+                "--size", str(size), "--repeat", str(args.repeat),
+                "--warmup", str(args.warmup), "--seed", str(args.seed),
+            ]
+            completed = subprocess.run(
+                command, capture_output=True, text=True, check=True)
+            timings = json.loads(completed.stdout.strip().splitlines()[-1])
+            records.append(make_record(
+                "lab2.mpi_matrix_dot", size, workers, "", timings))
+    return records
+
+
+def bench_lab3(args, rng: np.random.Generator) -> list[dict]:
+    try:
+        lab3 = load_module(
+            "lab3_sle_solver",
+            os.path.join(ROOT, "lab3", "sle_solver_var1.py"))
+    except ImportError as error:
+        print(f"lab3 skipped: {error} (build it with "
+              "`python setup.py build_ext --inplace` in lab3)",
+              file=sys.stderr)
+        return []
+
+    records = []
+    for size in args.sizes:
+        matrix_a = np.matrix(rng.random((size, size)))
+        vector_x = rng.random((size, 1))
+        expected = np.dot(matrix_a, vector_x)
+
+        for schedule in args.schedules:
+            lab3.schedule = schedule
+            for workers in args.workers:
+                assert np.allclose(expected, lab3.openmp_matrix_dot(
+                    matrix_a, vector_x, workers))
+                records.append(make_record(
+                    "lab3.openmp_matrix_dot", size, workers,
+                    f"schedule={schedule}",
+                    measure(lambda: lab3.openmp_matrix_dot(
+                        matrix_a, vector_x, workers),
+                        args.repeat, args.warmup)))
+    return records
+
+
+def write_results(prefix: str, meta: dict, records: list[dict]) -> None:
+    with open(f"{prefix}.json", "w") as file:
+        json.dump({"meta": meta, "results": records}, file,
+                  indent=2, sort_keys=True)
+
+    with open(f"{prefix}.csv", "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the lab1-lab3 matrix kernels.")
+    parser.add_argument("--labs", nargs="+", default=["lab1", "lab2", "lab3"],
+                        choices=["lab1", "lab2", "lab3"])
+    parser.add_argument("--sizes", nargs="+", type=int,
+                        default=[64, 150, 300])
+    parser.add_argument("--workers", nargs="+", type=int,
+                        default=[1, 2, 4])
+    parser.add_argument("--split-sizes", nargs="+", type=int,
+                        default=[1, 2, 5, 10])
+    parser.add_argument("--backends", nargs="+",
+                        default=["asyncio", "thread", "process"])
+    parser.add_argument("--schedules", nargs="+", default=["static"],
+                        choices=["static", "dynamic", "guided"],
+                        help="OpenMP loop schedules timed for lab3")
+    parser.add_argument("--strassen-sizes", nargs="+", type=int,
+                        default=[128, 256, 512, 1024],
+                        help="sizes of the classic vs Strassen sweep")
+    parser.add_argument("--strassen-cutoffs", nargs="+", type=int,
+                        default=[32, 64, 128],
+                        help="Strassen cutoffs timed in lab1")
+    parser.add_argument("--reference-limit", type=int, default=150,
+                        help="largest size timed with the reference loop")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mpiexec", default="mpiexec")
+    parser.add_argument("--output", default="benchmark",
+                        help="writes <output>.json and <output>.csv")
+    parser.add_argument("--mpi-rank", action="store_true",
+                        help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.mpi_rank:
+        bench_lab2_rank(args)
+        return
+
+    rng = np.random.default_rng(args.seed)
+    records = []
+    if "lab1" in args.labs:
+        records += bench_lab1(args, rng)
+        records += bench_lab1_strassen(args, rng)
+    if "lab2" in args.labs:
+        records += bench_lab2(args)
+    if "lab3" in args.labs:
+        records += bench_lab3(args, rng)
+    add_speedup(records)
+
+    meta = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "sizes": args.sizes,
+        "workers": args.workers,
+        "repeat": args.repeat,
+        "warmup": args.warmup,
+        "seed": args.seed,
+    }
+    crossover = strassen_crossover(records)
+    if crossover:
+        meta["strassen_crossover"] = crossover
+    write_results(args.output, meta, records)
+
+    for record in records:
+        print("%-40s size=%-5d workers=%-3d %-30s median=%f p95=%f "
+              "speedup=%.2f efficiency=%.2f" % (
+                  record["case"], record["size"], record["workers"],
+                  record["param"], record["median"], record["p95"],
+                  record["speedup"], record["efficiency"]))
+
+    for param, size in crossover.items():
+        cutoff = param.removeprefix("algorithm=strassen,")
+        if size is None:
+            print(f"Strassen ({cutoff}) never beats classic in the sweep")
+        else:
+            print(f"Strassen ({cutoff}) beats classic from size {size} on")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,110 +1,485 @@
 import numpy as np
 import asyncio
-import time
+import math
+import os
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
 
-def dot_matrices(
-        left_matrix: np.matrix[np.int64],
-        right_matrix: np.matrix[np.int64]
-) -> np.matrix[np.int64]:
+# The OpenMP kernels are built in lab3 (``python setup.py build_ext
+# --inplace``); mode="openmp" needs that directory on PYTHONPATH.
+try:
+    import OpenMP_funcs
+except ImportError:
+    OpenMP_funcs = None
+
+
+# 64 x 64 int64 tile is 32 KiB and fits L1d; a 256-deep panel of the
+# operands stays in L2 while its tiles are swept.
+L1_TILE_SIZE = 64
+L2_TILE_SIZE = 256
+
+# Several tiles per worker let the pool even out tiles that finish early.
+TILES_PER_WORKER = 4
+
+# Below this edge the tiled kernel beats another Strassen level.
+STRASSEN_CUTOFF = 128
 
-    assert left_matrix.shape == right_matrix.shape and left_matrix.shape[
-        0] == left_matrix.shape[1]
+# Threads of one mode="openmp" product; lower it when pool workers
+# already run several products side by side.
+OPENMP_THREADS = os.cpu_count() or 1
 
-    result_matrix = np.matrix(np.zeros(left_matrix.shape, dtype=np.int64))
+
+def private_dot_reference(
+        left_matrix: np.ndarray[np.int64],
+        right_matrix: np.ndarray[np.int64],
+        result_matrix: np.ndarray[np.int64]
+) -> None:
 
     for row in range(result_matrix.shape[0]):
         for col in range(result_matrix.shape[1]):
-            for i in range(result_matrix.shape[0]):
+            for i in range(left_matrix.shape[1]):
                 result_matrix[row, col] += left_matrix[row, i] * \
                     right_matrix[i, col]
 
+
+def private_dot_tiled(
+        left_matrix: np.ndarray[np.int64],
+        right_matrix: np.ndarray[np.int64],
+        result_matrix: np.ndarray[np.int64]
+) -> None:
+
+    for depth in range(0, left_matrix.shape[1], L2_TILE_SIZE):
+        left_panel = left_matrix[:, depth: depth + L2_TILE_SIZE]
+        right_panel = right_matrix[depth: depth + L2_TILE_SIZE]
+        for row in range(0, result_matrix.shape[0], L1_TILE_SIZE):
+            left_tile = left_panel[row: row + L1_TILE_SIZE]
+            for col in range(0, result_matrix.shape[1], L1_TILE_SIZE):
+                result_matrix[row: row + L1_TILE_SIZE,
+                              col: col + L1_TILE_SIZE] += \
+                    left_tile @ right_panel[:, col: col + L1_TILE_SIZE]
+
+
+def private_dot_openmp(
+        left_matrix: np.ndarray[np.int64],
+        right_matrix: np.ndarray[np.int64],
+        result_matrix: np.ndarray[np.int64]
+) -> None:
+
+    # Blocks of a parallel product are strided views, while the extension
+    # reads C-contiguous buffers.
+    product = np.empty(result_matrix.shape, dtype=np.int64)
+    OpenMP_funcs.openmp_matrix_matmul(
+        np.ascontiguousarray(left_matrix, dtype=np.int64),
+        np.ascontiguousarray(right_matrix, dtype=np.int64),
+        OPENMP_THREADS, product)
+    result_matrix += product
+
+
+def private_dot_kernel(mode: str):
+    match mode:
+        case "reference":
+            return private_dot_reference
+        case "tiled":
+            return private_dot_tiled
+        case "openmp":
+            if OpenMP_funcs is None:
+                raise ImportError(
+                    "mode='openmp' needs the OpenMP_funcs extension from lab3")
+            return private_dot_openmp
+        case _:
+            raise ValueError(f"Unknown mode: {mode}")
+
+
+def private_strassen_operands(
+        left_matrix: np.ndarray[np.int64],
+        right_matrix: np.ndarray[np.int64]
+) -> list[tuple[np.ndarray[np.int64], np.ndarray[np.int64]]]:
+
+    # Odd edges are padded with a zero row/column, which does not change
+    # the product and is cut off again in private_strassen_combine.
+    left_matrix = np.pad(left_matrix, (
+        (0, left_matrix.shape[0] % 2), (0, left_matrix.shape[1] % 2)))
+    right_matrix = np.pad(right_matrix, (
+        (0, right_matrix.shape[0] % 2), (0, right_matrix.shape[1] % 2)))
+
+    m, k, n = (left_matrix.shape[0] // 2, left_matrix.shape[1] // 2,
+               right_matrix.shape[1] // 2)
+    a11, a12 = left_matrix[:m, :k], left_matrix[:m, k:]
+    a21, a22 = left_matrix[m:, :k], left_matrix[m:, k:]
+    b11, b12 = right_matrix[:k, :n], right_matrix[:k, n:]
+    b21, b22 = right_matrix[k:, :n], right_matrix[k:, n:]
+
+    # Winograd's form of Strassen: 7 products and 15 additions.
+    s1 = a21 + a22
+    s2 = s1 - a11
+    s3 = a11 - a21
+    s4 = a12 - s2
+    t1 = b12 - b11
+    t2 = b22 - t1
+    t3 = b22 - b12
+    t4 = t2 - b21
+
+    return [(a11, b11), (a12, b21), (s4, b22), (a22, t4),
+            (s1, t1), (s2, t2), (s3, t3)]
+
+
+def private_strassen_combine(
+        products: list[np.ndarray[np.int64]],
+        shape: tuple[int, int]
+) -> np.ndarray[np.int64]:
+
+    m1, m2, m3, m4, m5, m6, m7 = products
+
+    u2 = m1 + m6
+    u3 = u2 + m7
+    u4 = u2 + m5
+
+    result_matrix = np.block([[m1 + m2, u4 + m3],
+                              [u3 - m4, u3 + m5]])
+
+    return result_matrix[:shape[0], :shape[1]]
+
+
+def private_dot_strassen(
+        left_matrix: np.ndarray[np.int64],
+        right_matrix: np.ndarray[np.int64],
+        cutoff: int = STRASSEN_CUTOFF,
+        mode: str = "tiled"
+) -> np.ndarray[np.int64]:
+
+    shape = (left_matrix.shape[0], right_matrix.shape[1])
+
+    if min(*shape, left_matrix.shape[1]) <= cutoff:
+        result_matrix = np.zeros(shape, dtype=np.int64)
+        private_dot_kernel(mode)(left_matrix, right_matrix, result_matrix)
+        return result_matrix
+
+    return private_strassen_combine(
+        [private_dot_strassen(left, right, cutoff, mode)
+         for left, right in private_strassen_operands(
+             left_matrix, right_matrix)],
+        shape)
+
+
+def dot_matrices(
+        left_matrix: np.matrix[np.int64],
+        right_matrix: np.matrix[np.int64],
+        mode: str = "tiled",
+        algorithm: str = "classic",
+        cutoff: int = STRASSEN_CUTOFF
+) -> np.matrix[np.int64]:
+
+    assert left_matrix.shape[1] == right_matrix.shape[0]
+
+    assert cutoff > 0
+
+    match algorithm:
+        case "classic":
+            result_matrix = np.matrix(np.zeros(
+                (left_matrix.shape[0], right_matrix.shape[1]),
+                dtype=np.int64))
+
+            private_dot_kernel(mode)(np.asarray(left_matrix),
+                                     np.asarray(right_matrix),
+                                     np.asarray(result_matrix))
+        case "strassen":
+            result_matrix = np.matrix(private_dot_strassen(
+                np.asarray(left_matrix), np.asarray(right_matrix),
+                cutoff, mode))
+        case _:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+
     return result_matrix
 
 
+def private_split_bounds(length: int, parts: int) -> list[slice]:
+    step, extra = divmod(length, parts)
+
+    bounds = [0]
+    for part in range(parts):
+        bounds.append(bounds[-1] + step + (part < extra))
+
+    return [slice(begin, end)
+            for begin, end in zip(bounds, bounds[1:]) if begin < end]
+
+
+def private_schedule_tiles(
+        rows: int,
+        cols: int,
+        split_size: int | None,
+        workers: int
+) -> list[tuple[slice, slice]]:
+
+    if split_size is not None:
+        grid_rows = grid_cols = split_size
+    else:
+        # Aim for TILES_PER_WORKER near-square tiles per worker, but never
+        # cut below an L1 tile on either side. Several tiles per worker
+        # even out the load without rounding the grid to the worker count.
+        max_rows = max(1, rows // L1_TILE_SIZE)
+        max_cols = max(1, cols // L1_TILE_SIZE)
+        tiles = max(1, min(TILES_PER_WORKER * workers, max_rows * max_cols))
+
+        grid_rows = max(1, min(max_rows,
+                               round(math.sqrt(tiles * rows / cols))))
+        grid_cols = min(max_cols, math.ceil(tiles / grid_rows))
+        # A capped column count leaves the rest of the tiles to the rows.
+        grid_rows = min(max_rows, math.ceil(tiles / grid_cols))
+
+    return [(row_bounds, col_bounds)
+            for row_bounds in private_split_bounds(rows, min(grid_rows, rows))
+            for col_bounds in private_split_bounds(cols, min(grid_cols, cols))]
+
+
+def private_dot_block(
+        left_matrix: np.ndarray[np.int64],
+        right_matrix: np.ndarray[np.int64],
+        block: tuple[slice, slice],
+        result_matrix: np.ndarray[np.int64],
+        mode: str = "tiled"
+) -> None:
+
+    rows, cols = block
+
+    private_dot_kernel(mode)(left_matrix[rows], right_matrix[:, cols],
+                             result_matrix[rows, cols])
+
+
+def private_dot_shared_block(
+        shared_names: tuple[str, str, str],
+        shapes: tuple[tuple[int, int], tuple[int, int], tuple[int, int]],
+        block: tuple[slice, slice],
+        mode: str
+) -> None:
+
+    shared = [shared_memory.SharedMemory(name=name) for name in shared_names]
+    matrices = [np.ndarray(shape, dtype=np.int64, buffer=shm.buf)
+                for shm, shape in zip(shared, shapes)]
+
+    private_dot_block(matrices[0], matrices[1], block, matrices[2], mode)
+
+    # Views must be dropped before the segments can be closed.
+    del matrices
+    for shm in shared:
+        shm.close()
+
+
 async def private_dot_matrices_parallel(
         left_matrix: np.matrix[np.int64],
         right_matrix: np.matrix[np.int64],
-        block_size: np.int8,
-        block_cords: tuple[np.int8, np.int8],
-        result_matrix: np.matrix[np.int64]
+        block: tuple[slice, slice],
+        result_matrix: np.matrix[np.int64],
+        mode: str = "tiled"
 ) -> None:
 
-    for row in range(block_cords[0], block_cords[0] + block_size):
-        for col in range(block_cords[1], block_cords[1] + block_size):
-            for i in range(left_matrix.shape[0]):
-                result_matrix[row, col] += left_matrix[row, i] * \
-                    right_matrix[i, col]
+    private_dot_block(left_matrix, right_matrix, block, result_matrix, mode)
+
+
+async def private_dot_blocks_thread(
+        left_matrix: np.ndarray[np.int64],
+        right_matrix: np.ndarray[np.int64],
+        blocks: list[tuple[slice, slice]],
+        result_matrix: np.ndarray[np.int64],
+        max_workers: int,
+        mode: str
+) -> None:
+
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers) as executor:
+        await asyncio.gather(*(
+            loop.run_in_executor(
+                executor, private_dot_block,
+                left_matrix, right_matrix, block, result_matrix, mode)
+            for block in blocks
+        ))
+
+
+async def private_dot_blocks_process(
+        left_matrix: np.ndarray[np.int64],
+        right_matrix: np.ndarray[np.int64],
+        blocks: list[tuple[slice, slice]],
+        result_matrix: np.ndarray[np.int64],
+        max_workers: int,
+        mode: str
+) -> None:
+
+    shapes = (left_matrix.shape, right_matrix.shape, result_matrix.shape)
+    shared = [shared_memory.SharedMemory(
+        create=True, size=max(1, math.prod(shape) * 8)) for shape in shapes]
+    try:
+        matrices = [np.ndarray(shape, dtype=np.int64, buffer=shm.buf)
+                    for shm, shape in zip(shared, shapes)]
+        matrices[0][:] = left_matrix
+        matrices[1][:] = right_matrix
+        matrices[2][:] = 0
+
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers) as executor:
+            await asyncio.gather(*(
+                loop.run_in_executor(
+                    executor, private_dot_shared_block,
+                    tuple(shm.name for shm in shared), shapes, block, mode)
+                for block in blocks
+            ))
+
+        result_matrix[:] = matrices[2]
+        del matrices
+    finally:
+        for shm in shared:
+            shm.close()
+            shm.unlink()
+
+
+async def private_strassen_tree(
+        left_matrix: np.ndarray[np.int64],
+        right_matrix: np.ndarray[np.int64],
+        cutoff: int,
+        depth: int,
+        run_product
+) -> np.ndarray[np.int64]:
+
+    shape = (left_matrix.shape[0], right_matrix.shape[1])
+
+    if depth == 0 or min(*shape, left_matrix.shape[1]) <= cutoff:
+        return await run_product(left_matrix, right_matrix)
+
+    # All sub-products of the unrolled levels are awaited together, so
+    # the 7 ** depth leaves are in flight at the same time.
+    products = await asyncio.gather(*(
+        private_strassen_tree(left, right, cutoff, depth - 1, run_product)
+        for left, right in private_strassen_operands(
+            left_matrix, right_matrix)
+    ))
+
+    return private_strassen_combine(products, shape)
+
+
+async def private_dot_strassen_parallel(
+        left_matrix: np.ndarray[np.int64],
+        right_matrix: np.ndarray[np.int64],
+        cutoff: int,
+        backend: str,
+        max_workers: int,
+        mode: str
+) -> np.ndarray[np.int64]:
+
+    # Unroll enough levels to give every worker at least one leaf.
+    depth = max(1, math.ceil(math.log(max_workers, 7)))
+
+    match backend:
+        case "asyncio":
+            async def run_product(left, right):
+                return private_dot_strassen(left, right, cutoff, mode)
+
+            return await private_strassen_tree(
+                left_matrix, right_matrix, cutoff, depth, run_product)
+        case "thread":
+            executor = ThreadPoolExecutor(max_workers)
+        case "process":
+            executor = ProcessPoolExecutor(max_workers)
+        case _:
+            raise ValueError(f"Unknown backend: {backend}")
+
+    loop = asyncio.get_running_loop()
+    with executor:
+        async def run_product(left, right):
+            return await loop.run_in_executor(
+                executor, private_dot_strassen, left, right, cutoff, mode)
+
+        return await private_strassen_tree(
+            left_matrix, right_matrix, cutoff, depth, run_product)
 
 
 async def dot_matrices_parallel(
         left_matrix: np.matrix[np.int64],
         right_matrix: np.matrix[np.int64],
-        split_size: np.int64 = 1
+        split_size: int | None = None,
+        backend: str = "asyncio",
+        max_workers: int | None = None,
+        mode: str = "tiled",
+        algorithm: str = "classic",
+        cutoff: int = STRASSEN_CUTOFF
 ) -> np.matrix[np.int64]:
 
-    assert left_matrix.shape == right_matrix.shape and left_matrix.shape[
-        0] == left_matrix.shape[1]
+    assert left_matrix.shape[1] == right_matrix.shape[0]
 
-    assert left_matrix.shape[0] % split_size == 0
+    assert split_size is None or split_size > 0
 
-    result_matrix = np.matrix(np.zeros(left_matrix.shape, dtype=np.int64))
+    assert cutoff > 0
 
-    block_size = left_matrix.shape[0] // split_size
+    if max_workers is None:
+        max_workers = os.cpu_count()
 
-    async with asyncio.TaskGroup() as tg:
-        for block_row in range(0, split_size * block_size, block_size):
-            for block_col in range(0, split_size * block_size, block_size):
-                tg.create_task(
-                    private_dot_matrices_parallel(
-                        left_matrix, right_matrix,
-                        block_size, (block_row, block_col),
-                        result_matrix)
-                )
+    match algorithm:
+        case "classic":
+            pass
+        case "strassen":
+            return np.matrix(await private_dot_strassen_parallel(
+                np.asarray(left_matrix), np.asarray(right_matrix),
+                cutoff, backend, max_workers, mode))
+        case _:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+
+    result_matrix = np.matrix(np.zeros(
+        (left_matrix.shape[0], right_matrix.shape[1]), dtype=np.int64))
+
+    blocks = private_schedule_tiles(
+        result_matrix.shape[0], result_matrix.shape[1],
+        split_size, max_workers)
+
+    match backend:
+        case "asyncio":
+            async with asyncio.TaskGroup() as tg:
+                for block in blocks:
+                    tg.create_task(
+                        private_dot_matrices_parallel(
+                            left_matrix, right_matrix,
+                            block, result_matrix, mode)
+                    )
+        case "thread":
+            await private_dot_blocks_thread(
+                np.asarray(left_matrix), np.asarray(right_matrix),
+                blocks, np.asarray(result_matrix), max_workers, mode)
+        case "process":
+            await private_dot_blocks_process(
+                np.asarray(left_matrix), np.asarray(right_matrix),
+                blocks, np.asarray(result_matrix), max_workers, mode)
+        case _:
+            raise ValueError(f"Unknown backend: {backend}")
 
     return result_matrix
 
 
 def main():
-    size = 150
-    left_matrix = np.matrix(np.random.rand(size, size) * 10, dtype=np.int64)
-    right_matrix = np.matrix(np.random.rand(size, size) * 10, dtype=np.int64)
-
-    print("Numpy lib: ", end="")
-    start_time = time.time()
-    result_matrix = np.dot(left_matrix, right_matrix)
-    assert np.array_equal(result_matrix, result_matrix)
-    print("%f\n" % (time.time() - start_time))
-
-    print("Parallel hand-made func (treads: 10): ", end="")
-    start_time = time.time()
-    assert np.array_equal(result_matrix, asyncio.run(
-        dot_matrices_parallel(left_matrix, right_matrix, 10)))
-    print("%f\n" % (time.time() - start_time))
-
-    print("Parallel hand-made func (treads: 5): ", end="")
-    start_time = time.time()
-    assert np.array_equal(result_matrix, asyncio.run(
-        dot_matrices_parallel(left_matrix, right_matrix, 5)))
-    print("%f\n" % (time.time() - start_time))
-
-    print("Parallel hand-made func (treads: 2): ", end="")
-    start_time = time.time()
-    assert np.array_equal(result_matrix, asyncio.run(
-        dot_matrices_parallel(left_matrix, right_matrix, 2)))
-    print("%f\n" % (time.time() - start_time))
-
-    print("Parallel hand-made func (treads: 1): ", end="")
-    start_time = time.time()
-    assert np.array_equal(result_matrix, asyncio.run(
-        dot_matrices_parallel(left_matrix, right_matrix, 1)))
-    print("%f\n" % (time.time() - start_time))
-
-    print("Linear hand-made func: ", end="")
-    start_time = time.time()
-    assert np.array_equal(
-        result_matrix, dot_matrices(left_matrix, right_matrix))
-    print("%f\n" % (time.time() - start_time))
+    # Timings, the classic vs Strassen sweep included, live in
+    # benchmark.py at the repository root; this only checks every kernel
+    # against NumPy.
+    for shape in ((150, 150, 150), (100, 77, 33)):
+        left_matrix = np.matrix(np.random.randint(
+            0, 10, shape[:2]), dtype=np.int64)
+        right_matrix = np.matrix(np.random.randint(
+            0, 10, shape[1:]), dtype=np.int64)
+        result_matrix = np.dot(left_matrix, right_matrix)
+
+        for mode in ("tiled", "reference") + \
+                (("openmp",) if OpenMP_funcs is not None else ()):
+            assert np.array_equal(
+                result_matrix, dot_matrices(left_matrix, right_matrix, mode))
+        assert np.array_equal(result_matrix, dot_matrices(
+            left_matrix, right_matrix, algorithm="strassen", cutoff=16))
+
+        for backend in ("asyncio", "thread", "process"):
+            for split_size in (None, 1, 2, 5, 10):
+                assert np.array_equal(result_matrix, asyncio.run(
+                    dot_matrices_parallel(left_matrix, right_matrix,
+                                          split_size, backend)))
+            assert np.array_equal(result_matrix, asyncio.run(
+                dot_matrices_parallel(left_matrix, right_matrix,
+                                      backend=backend, algorithm="strassen",
+                                      cutoff=16)))
+
+        print("%dx%d @ %dx%d: OK" % (*shape[:2], *shape[1:]))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+import numpy as np
+from dataclasses import dataclass, field
+
+
+@dataclass
+class CSRMatrix:
+    # Row i holds data[indptr[i]: indptr[i + 1]] in the columns
+    # indices[indptr[i]: indptr[i + 1]]; memory grows with nnz, not N^2.
+    indptr: np.ndarray[None, int]
+    indices: np.ndarray[None, int]
+    data: np.ndarray[None, float]
+    shape: tuple[int, int]
+    row_ids: np.ndarray[None, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.indptr = np.ascontiguousarray(self.indptr, dtype=np.int64)
+        self.indices = np.ascontiguousarray(self.indices, dtype=np.int64)
+        self.data = np.ascontiguousarray(self.data, dtype=np.float64)
+        self.shape = (int(self.shape[0]), int(self.shape[1]))
+
+        assert self.indptr.shape == (self.shape[0] + 1,)
+        assert self.indptr[0] == 0 and np.all(np.diff(self.indptr) >= 0)
+        assert self.indices.shape == self.data.shape == (self.indptr[-1],)
+        assert np.all((0 <= self.indices) & (self.indices < self.shape[1]))
+
+        # Row of every stored value, so that a matvec is one bincount.
+        self.row_ids = np.repeat(np.arange(self.shape[0]), self.row_nnz())
+
+    @classmethod
+    def from_dense(cls, matrix: np.matrix[float, float]) -> "CSRMatrix":
+        matrix = np.asarray(matrix, dtype=np.float64)
+        rows, cols = np.nonzero(matrix)
+        indptr = np.concatenate(
+            ([0], np.cumsum(np.bincount(rows, minlength=matrix.shape[0]))))
+        return cls(indptr, cols, matrix[rows, cols], matrix.shape)
+
+    @property
+    def nnz(self) -> int:
+        return self.data.shape[0]
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.data.dtype
+
+    def row_nnz(self) -> np.ndarray[None, int]:
+        return np.diff(self.indptr)
+
+    def take_rows(self, rows: slice | np.ndarray[None, int]) -> "CSRMatrix":
+        row_nnz = self.row_nnz()[rows]
+        starts = self.indptr[:-1][rows]
+        # Position of every kept value: its row start plus its offset.
+        positions = (np.repeat(starts - np.cumsum(row_nnz) + row_nnz, row_nnz)
+                     + np.arange(row_nnz.sum()))
+        return CSRMatrix(np.concatenate(([0], np.cumsum(row_nnz))),
+                         self.indices[positions], self.data[positions],
+                         (row_nnz.shape[0], self.shape[1]))
+
+    def diagonal(self) -> np.ndarray[None, float]:
+        diagonal = np.zeros(min(self.shape))
+        on_diagonal = self.row_ids == self.indices
+        diagonal[self.row_ids[on_diagonal]] = self.data[on_diagonal]
+        return diagonal
+
+    def toarray(self) -> np.ndarray[float, float]:
+        matrix = np.zeros(self.shape)
+        matrix[self.row_ids, self.indices] = self.data
+        return matrix
+
+    def dot(
+        self,
+        vector_x: np.ndarray[None, float],
+    ) -> np.ndarray[None, float]:
+        vector_x = np.asarray(vector_x)
+        assert vector_x.shape[0] == self.shape[1]
+
+        # (N,) and (N, 1) vectors keep their shape; an (N, k) block is
+        # multiplied column by column.
+        columns = vector_x.reshape(self.shape[1], -1)
+        result = np.empty((self.shape[0], columns.shape[1]))
+        for column in range(columns.shape[1]):
+            products = self.data * columns[self.indices, column]
+            result[:, column] = np.bincount(
+                self.row_ids, weights=products, minlength=self.shape[0])
+
+        return result.reshape((self.shape[0], *vector_x.shape[1:]))
+
+    __matmul__ = dot
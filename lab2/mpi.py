@@ -6,8 +6,10 @@ size = comm.Get_size()
 # print(worker, size)
 if worker != 0:
     # print(worker)
-    i = comm.recv(source=0)
-    comm.send(i + 5, dest=0)
+    # One answer for each of the two rounds the root starts.
+    for _ in range(2):
+        i = comm.recv(source=0)
+        comm.send(i + 5, dest=0)
 else:
     reqs = []
     reqr = []
@@ -24,8 +26,8 @@ else:
 
     reqs, reqr = [], []
     for i in range(size):
-        reqs[i] = comm.isend(res[i], dest=i)
-        reqr[i] = comm.irecv(source=i)
+        reqs.append(comm.isend(res[i], dest=i))
+        reqr.append(comm.irecv(source=i))
 
     # print(dir(reqs[0]))
     for i in range(size):
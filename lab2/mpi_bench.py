@@ -0,0 +1,287 @@
+import argparse
+import csv
+import json
+import sys
+
+import numpy as np
+from mpi4py import MPI
+
+# mpiexec -n K python mpi_bench.py [--sizes ...] [--output prefix]
+#
+# Point-to-point and collective costs on the ranks of one job, each
+# through both mpi4py paths: "pickle" (send/recv, gather, bcast: any
+# object, serialized) and "buffer" (Send/Recv, Gather, Bcast: raw memory).
+
+comm = MPI.COMM_WORLD
+worker = comm.Get_rank()
+size = comm.Get_size()
+
+PATHS = ("pickle", "buffer")
+
+FIELDS = ("case", "size", "workers", "param", "repeat",
+          "median", "p95", "bandwidth")
+
+
+def measure(op, repeat: int, warmup: int) -> list[float] | None:
+    # Every repetition starts on all ranks together and lasts until the
+    # slowest of them is done; the timings end up on the root.
+    for _ in range(warmup):
+        op()
+
+    timings = []
+    for _ in range(repeat):
+        comm.Barrier()
+        start_time = MPI.Wtime()
+        op()
+        timings.append(comm.reduce(MPI.Wtime() - start_time,
+                                   op=MPI.MAX, root=0))
+    return timings if worker == 0 else None
+
+
+def make_record(
+    case: str,
+    nbytes: int,
+    param: str,
+    timings: list[float],
+    moved: int,
+) -> dict:
+    # moved is the number of bytes one timed operation delivers, so the
+    # bandwidth (MB/s) compares the paths at equal payloads.
+    median = float(np.median(timings))
+    return {
+        "case": case,
+        "size": nbytes,
+        "workers": size,
+        "param": param,
+        "repeat": len(timings),
+        "median": median,
+        "p95": float(np.percentile(timings, 95)),
+        "bandwidth": moved / median / 1e6 if median > 0 else float("inf"),
+    }
+
+
+def pingpong(message: np.ndarray, path: str, iterations: int):
+    # Ranks 0 and 1 bounce the message; the rest only wait at the barrier.
+    def op():
+        if worker > 1:
+            return
+        other = 1 - worker
+        for _ in range(iterations):
+            match path, worker:
+                case "pickle", 0:
+                    comm.send(message, dest=other)
+                    comm.recv(source=other)
+                case "pickle", 1:
+                    comm.send(comm.recv(source=other), dest=other)
+                case "buffer", 0:
+                    comm.Send(message, dest=other)
+                    comm.Recv(message, source=other)
+                case "buffer", 1:
+                    comm.Recv(message, source=other)
+                    comm.Send(message, dest=other)
+    return op
+
+
+def ring(message: np.ndarray, path: str):
+    # The relay of mpi_dot.py closed into a ring: 0 -> 1 -> ... -> 0, one
+    # whole message at a time.
+    following, previous = (worker + 1) % size, (worker - 1) % size
+
+    def op():
+        match path:
+            case "pickle":
+                if worker == 0:
+                    comm.send(message, dest=following)
+                    comm.recv(source=previous)
+                else:
+                    comm.send(comm.recv(source=previous), dest=following)
+            case "buffer":
+                if worker == 0:
+                    comm.Send(message, dest=following)
+                    comm.Recv(message, source=previous)
+                else:
+                    comm.Recv(message, source=previous)
+                    comm.Send(message, dest=following)
+    return op
+
+
+def pipeline(message: np.ndarray, path: str, chunks: int):
+    # The same chain 0 -> 1 -> ... -> K-1, with the message cut into chunks
+    # that every rank forwards as soon as each arrives.
+    parts = np.array_split(message, chunks)
+
+    def op():
+        requests = []
+        for part in parts:
+            if worker > 0:
+                if path == "pickle":
+                    part = comm.recv(source=worker - 1)
+                else:
+                    comm.Recv(part, source=worker - 1)
+            if worker < size - 1:
+                if path == "pickle":
+                    requests.append(comm.isend(part, dest=worker + 1))
+                else:
+                    requests.append(comm.Isend(part, dest=worker + 1))
+        if path == "pickle":
+            MPI.Request.waitall(requests)
+        else:
+            MPI.Request.Waitall(requests)
+    return op
+
+
+def gather(message: np.ndarray, path: str, method: str):
+    # "root": the isend/irecv round of mpi.py, one message per rank posted
+    # by the root; "collective": the library's Gather, usually a tree.
+    received = np.empty((size, message.shape[0]), dtype=message.dtype)
+    # irecv only takes pickles up to 32 KiB into a buffer of its own.
+    pickled = [bytearray(len(MPI.pickle.dumps(message)))
+               for _ in range(size)]
+
+    def op():
+        match method, path:
+            case "root", "pickle":
+                if worker == 0:
+                    requests = [comm.irecv(pickled[i], source=i)
+                                for i in range(1, size)]
+                    MPI.Request.waitall(requests)
+                else:
+                    comm.send(message, dest=0)
+            case "root", "buffer":
+                if worker == 0:
+                    MPI.Request.Waitall([
+                        comm.Irecv(received[i], source=i)
+                        for i in range(1, size)])
+                else:
+                    comm.Send(message, dest=0)
+            case "collective", "pickle":
+                comm.gather(message, root=0)
+            case "collective", "buffer":
+                comm.Gather(message, received if worker == 0 else None,
+                            root=0)
+            case _:
+                raise ValueError(f"Unknown gather method: {method}")
+    return op
+
+
+def bcast(message: np.ndarray, path: str, method: str):
+    # The opposite direction: the root sends its message to every rank.
+    def op():
+        match method, path:
+            case "root", "pickle":
+                if worker == 0:
+                    MPI.Request.waitall([comm.isend(message, dest=i)
+                                         for i in range(1, size)])
+                else:
+                    comm.recv(source=0)
+            case "root", "buffer":
+                if worker == 0:
+                    MPI.Request.Waitall([comm.Isend(message, dest=i)
+                                         for i in range(1, size)])
+                else:
+                    comm.Recv(message, source=0)
+            case "collective", "pickle":
+                comm.bcast(message, root=0)
+            case "collective", "buffer":
+                comm.Bcast(message, root=0)
+            case _:
+                raise ValueError(f"Unknown bcast method: {method}")
+    return op
+
+
+def run(args) -> list[dict]:
+    records = []
+    for nbytes in args.sizes:
+        message = np.zeros(nbytes, dtype=np.uint8)
+        for path in PATHS:
+            def add(case, op, moved, messages=1):
+                # Point-to-point cases are reported per message.
+                timings = measure(op, args.repeat, args.warmup)
+                if worker == 0:
+                    records.append(make_record(
+                        case, nbytes, f"path={path}",
+                        [timing / messages for timing in timings], moved))
+
+            if "pingpong" in args.cases and size > 1:
+                add("pingpong", pingpong(message, path, args.iterations),
+                    nbytes, 2 * args.iterations)
+            if "ring" in args.cases and size > 1:
+                add("ring", ring(message, path), nbytes, size)
+            if "pipeline" in args.cases and size > 1:
+                add(f"pipeline[{args.chunks}]",
+                    pipeline(message, path, args.chunks), nbytes)
+            for method in ("root", "collective"):
+                if "gather" in args.cases:
+                    add(f"gather[{method}]", gather(message, path, method),
+                        (size - 1) * nbytes)
+                if "bcast" in args.cases:
+                    add(f"bcast[{method}]", bcast(message, path, method),
+                        (size - 1) * nbytes)
+    return records
+
+
+def write_results(prefix: str, meta: dict, records: list[dict]) -> None:
+    with open(f"{prefix}.json", "w") as file:
+        json.dump({"meta": meta, "results": records}, file,
+                  indent=2, sort_keys=True)
+
+    with open(f"{prefix}.csv", "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="MPI latency, bandwidth and collective microbenchmarks.")
+    parser.add_argument("--cases", nargs="+",
+                        default=["pingpong", "ring", "pipeline",
+                                 "gather", "bcast"],
+                        choices=["pingpong", "ring", "pipeline",
+                                 "gather", "bcast"])
+    parser.add_argument("--sizes", nargs="+", type=int,
+                        default=[8, 1024, 65536, 1 << 20],
+                        help="message sizes in bytes")
+    parser.add_argument("--iterations", type=int, default=100,
+                        help="round trips per timed ping-pong")
+    parser.add_argument("--chunks", type=int, default=8,
+                        help="pieces of a pipelined message")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--output",
+                        help="writes <output>.json and <output>.csv")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    records = run(args)
+    if worker != 0:
+        return
+
+    if size == 1:
+        print("pingpong, ring and pipeline need at least 2 ranks",
+              file=sys.stderr)
+
+    if args.output is not None:
+        meta = {
+            "mpi": MPI.Get_library_version().strip(),
+            "workers": size,
+            "sizes": args.sizes,
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "iterations": args.iterations,
+            "chunks": args.chunks,
+        }
+        write_results(args.output, meta, records)
+
+    for record in records:
+        print("%-22s size=%-8d workers=%-3d %-12s median=%e p95=%e "
+              "bandwidth=%.1f MB/s" % (
+                  record["case"], record["size"], record["workers"],
+                  record["param"], record["median"], record["p95"],
+                  record["bandwidth"]))
+
+
+if __name__ == "__main__":
+    main()
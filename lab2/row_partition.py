@@ -0,0 +1,76 @@
+import numpy as np
+from dataclasses import dataclass
+
+
+@dataclass
+class RowPartition:
+    # Part p owns rows order[displs[p]: displs[p] + counts[p]], or the
+    # contiguous range displs[p]: displs[p] + counts[p] when order is None.
+    counts: np.ndarray[None, int]
+    displs: np.ndarray[None, int]
+    order: np.ndarray[None, int] | None = None
+
+    def rows(self, part: int) -> slice | np.ndarray[None, int]:
+        part_rows = slice(self.displs[part],
+                          self.displs[part] + self.counts[part])
+        if self.order is None:
+            return part_rows
+        return self.order[part_rows]
+
+    def same_rows(self, other: "RowPartition") -> bool:
+        return (np.array_equal(self.counts, other.counts) and
+                np.array_equal(self.displs, other.displs) and
+                (self.order is None) == (other.order is None) and
+                (self.order is None or
+                 np.array_equal(self.order, other.order)))
+
+
+def private_displs(counts: np.ndarray[None, int]) -> np.ndarray[None, int]:
+    return np.concatenate(([0], np.cumsum(counts)[:-1])).astype(int)
+
+
+def block_partition(n_rows: int, parts: int) -> RowPartition:
+    assert parts > 0
+
+    step, extra = divmod(n_rows, parts)
+    counts = np.full(parts, step) + (np.arange(parts) < extra)
+
+    return RowPartition(counts, private_displs(counts))
+
+
+def cyclic_partition(n_rows: int, parts: int) -> RowPartition:
+    assert parts > 0
+
+    # Row i goes to part i % parts; order lists every part's rows in turn.
+    partition = block_partition(n_rows, parts)
+    partition.order = np.concatenate(
+        [np.arange(part, n_rows, parts) for part in range(parts)]
+    ).astype(int)
+
+    return partition
+
+
+def weighted_partition(
+    row_costs: np.ndarray[None, float],
+    parts: int,
+) -> RowPartition:
+    assert parts > 0
+
+    # Contiguous blocks cut where the running cost crosses each
+    # 1/parts share of the total, e.g. nonzeros per row of a sparse matrix.
+    row_costs = np.asarray(row_costs, dtype=np.float64).reshape(-1)
+    assert np.all(row_costs >= 0)
+
+    running_cost = np.cumsum(row_costs)
+    total_cost = running_cost[-1] if running_cost.size else 0.
+
+    if total_cost == 0:
+        return block_partition(row_costs.size, parts)
+
+    bounds = np.searchsorted(
+        running_cost, total_cost * np.arange(1, parts) / parts, side="left")
+    bounds = np.concatenate(([0], bounds + 1, [row_costs.size]))
+    bounds = np.minimum(np.maximum.accumulate(bounds), row_costs.size)
+    counts = np.diff(bounds)
+
+    return RowPartition(counts, private_displs(counts))
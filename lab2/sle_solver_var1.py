@@ -1,13 +1,93 @@
+import itertools
+import os
+import sys
+import time
 import numpy as np
+from contextlib import contextmanager
+from dataclasses import dataclass
 from mpi4py import MPI
 
+from csr_matrix import CSRMatrix
+from row_partition import (
+    RowPartition,
+    block_partition,
+    private_displs,
+    cyclic_partition,
+    weighted_partition,
+)
+
+# The OpenMP kernels are built in lab3 (``python setup.py build_ext
+# --inplace``); the "openmp" local backend needs that directory on
+# PYTHONPATH.
+try:
+    import OpenMP_funcs
+except ImportError:
+    OpenMP_funcs = None
+
+comm = MPI.COMM_WORLD
+worker = comm.Get_rank()
+size = comm.Get_size()
+
+# How every rank multiplies its own row block: "numpy", or "openmp" for
+# hybrid runs with one rank per node or socket and num_threads threads
+# each. Changed on all ranks at once through mpi_set_local_backend.
+local_backend = "numpy"
+num_threads = 1
+
+# Once the largest row block passes pipeline_bytes, x travels in up to
+# PIPELINE_MAX_CHUNKS chunks (about pipeline_bytes of the block each), so
+# that ranks multiply the columns of chunks that have arrived while the
+# rest are in flight. None turns the pipeline off.
+PIPELINE_BYTES = 1 << 20
+PIPELINE_MAX_CHUNKS = 16
+pipeline_bytes: int | None = PIPELINE_BYTES
+
+
+@dataclass
+class DistributedMatrix:
+    key: int
+    shape: tuple[int, int]
+    partition: RowPartition
+    diagonal: np.ndarray[None, float]
+
+
+@dataclass
+class DistributedVector:
+    key: int
+    shape: tuple[int, int]
+    partition: RowPartition
+
+
+_matrix_keys = itertools.count()
+
+# Row blocks held by this rank, keyed by DistributedMatrix.key.
+_matrix_blocks: dict[int, np.ndarray[float, float] | CSRMatrix] = {}
+
+# Rows of distributed vectors held by this rank, keyed by
+# DistributedVector.key (drawn from the same counter).
+_vector_blocks: dict[int, np.ndarray[None, float]] = {}
+
+# Seconds this rank spent multiplying its rows and inside the matvec
+# collectives (which includes waiting for slower ranks), and the rows of
+# the matrix it multiplied last.
+_rank_timings = {"rows": 0, "calls": 0, "compute": 0., "communication": 0.}
+
 
 class SLESolver:
 
+    @classmethod
+    def set_backend(
+        cls,
+        backend: str = "numpy",
+        threads: int | None = None,
+        pipeline: int | None = PIPELINE_BYTES,
+    ) -> None:
+        mpi_set_local_backend(backend, threads, pipeline)
+
     @classmethod
     def __next_iter(
         cls,
-        matrix_a: np.matrix[float, float],
+        matrix_a: np.matrix[float, float] | CSRMatrix | DistributedMatrix,
         vector_x: np.ndarray[None, float],
         vector_b: np.ndarray[None, float],
         tau: float
@@ -17,7 +97,7 @@ class SLESolver:
     @classmethod
     def __end_measure(
         cls,
-        matrix_a: np.matrix[float, float],
+        matrix_a: np.matrix[float, float] | CSRMatrix | DistributedMatrix,
         vector_x: np.ndarray[None, float],
         vector_b: np.ndarray[None, float],
     ) -> float:
@@ -27,15 +107,160 @@ class SLESolver:
     @classmethod
     def simple_iteration(
         cls,
-        matrix_a: np.matrix[float, float],
+        matrix_a: np.matrix[float, float] | CSRMatrix | DistributedMatrix,
+        vector_b: np.ndarray[None, float],
+        epsilon: float = 1e-10,
+    ) -> (np.ndarray[float, float] | None):
+
+        N = vector_b.shape[0]
+        assert matrix_a.shape == (N, N)
+        assert vector_b.shape == (N, 1)
+
+        # Rows of A are sent to the workers once per solve instead of on
+        # every matvec; a matrix distributed by the caller is reused as is.
+        with mpi_distributed_matrix(matrix_a) as matrix_a:
+            return cls.__simple_iteration(matrix_a, vector_b, epsilon)
+
+    @classmethod
+    def simple_iteration_block(
+        cls,
+        matrix_a: np.matrix[float, float] | CSRMatrix | DistributedMatrix,
+        vectors_b: np.ndarray[float, float],
+        epsilon: float = 1e-10,
+    ) -> np.ndarray[float, float]:
+
+        # Every column of B is its own system; all of them step together,
+        # so each iteration is one A @ X over the unconverged columns.
+        # Columns that diverge come back as NaN.
+        N, k = vectors_b.shape
+        assert matrix_a.shape == (N, N)
+
+        with mpi_distributed_matrix(matrix_a) as matrix_a:
+            return cls.__simple_iteration_block(matrix_a, vectors_b, epsilon)
+
+    @classmethod
+    def __simple_iteration_block(
+        cls,
+        matrix_a: np.matrix[float, float] | CSRMatrix | DistributedMatrix,
+        vectors_b: np.ndarray[float, float],
+        epsilon: float,
+    ) -> np.ndarray[float, float]:
+
+        N, k = vectors_b.shape
+        vectors_b = np.ascontiguousarray(vectors_b, dtype=np.float64)
+        if isinstance(matrix_a, DistributedMatrix):
+            comm.bcast(("simple_iteration_block",
+                        (matrix_a.key, N, k, epsilon, matrix_a.partition)),
+                       root=0)
+            return mpi_simple_iteration_block_rows(
+                matrix_a.key, vectors_b, N, k, epsilon, matrix_a.partition)
+
+        vectors_x = np.zeros((N, k))
+
+        def residual(columns):
+            vectors_r = matrix_dot(matrix_a, vectors_x[:, columns]) - \
+                vectors_b[:, columns]
+            return vectors_r, (vectors_r * vectors_r).sum(axis=0)
+
+        def update(columns, vectors_r, tau):
+            vectors_x[:, columns] -= vectors_r * tau
+
+        failed = block_simple_iteration(
+            residual, update, np.linalg.norm(vectors_b, axis=0),
+            .0001 / N, epsilon)
+        vectors_x[:, failed] = np.nan
+        return vectors_x
+
+    @classmethod
+    def mixed_precision(
+        cls,
+        matrix_a: np.matrix[float, float] | CSRMatrix | DistributedMatrix,
         vector_b: np.ndarray[None, float],
         epsilon: float = 1e-10,
+        inner_epsilon: float = 1e-3,
+        preconditioner: str | None = None,
+        max_refinements: int = 50,
     ) -> (np.ndarray[float, float] | None):
 
         N = vector_b.shape[0]
         assert matrix_a.shape == (N, N)
         assert vector_b.shape == (N, 1)
 
+        # Iterative refinement: each correction A d = r is solved by GMRES
+        # on a float32 copy of A, so the matvecs stream half the bytes,
+        # while r = b - A x and x itself stay in float64 and the answer
+        # still reaches float64 accuracy.
+        if np.linalg.norm(vector_b) == 0:
+            return np.zeros((N, 1))
+
+        with mpi_distributed_matrix(matrix_a) as matrix_a:
+            return cls.__mixed_precision(matrix_a, vector_b, epsilon,
+                                         inner_epsilon, preconditioner,
+                                         max_refinements)
+
+    @classmethod
+    def __mixed_precision(
+        cls,
+        matrix_a: np.matrix[float, float] | CSRMatrix | DistributedMatrix,
+        vector_b: np.ndarray[None, float],
+        epsilon: float,
+        inner_epsilon: float,
+        preconditioner: str | None,
+        max_refinements: int,
+    ) -> (np.ndarray[float, float] | None):
+
+        N = vector_b.shape[0]
+        matrix_low = mpi_astype(matrix_a, np.float32)
+        vector_b = np.array(vector_b, dtype=np.float64)
+        vector_b_norm = np.linalg.norm(vector_b)
+        vector_x = np.zeros((N, 1))
+        try:
+            last_measure = np.inf
+            for _ in range(max_refinements):
+                vector_r = vector_b - mpi_matrix_dot(matrix_a, vector_x)
+                actual_measure = np.linalg.norm(vector_r) / vector_b_norm
+                if actual_measure < epsilon:
+                    return vector_x
+                # The float32 corrections no longer help once the float64
+                # residual stops going down.
+                if actual_measure >= last_measure:
+                    return None
+                last_measure = actual_measure
+
+                # A correction that misses inner_epsilon still moves x closer.
+                vector_x += cls.__krylov(
+                    cls.__gmres, matrix_low, vector_r, inner_epsilon,
+                    preconditioner, None, None, 30, True)
+        finally:
+            if matrix_low is not matrix_a:
+                mpi_free_matrix(matrix_low)
+
+        return None
+
+    @classmethod
+    def __simple_iteration(
+        cls,
+        matrix_a: np.matrix[float, float] | CSRMatrix | DistributedMatrix,
+        vector_b: np.ndarray[None, float],
+        epsilon: float,
+    ) -> (np.ndarray[float, float] | None):
+
+        N = vector_b.shape[0]
+
+        # The residual A x - b behind the stop measure is the same one the
+        # next step needs, so the distributed solve computes it once per
+        # iteration on every rank.
+        if isinstance(matrix_a, DistributedMatrix):
+            overlap = mpi_pipeline_chunks(matrix_a) > 1
+            comm.bcast(("simple_iteration",
+                        (matrix_a.key, N, epsilon, matrix_a.partition,
+                         overlap)),
+                       root=0)
+            return mpi_simple_iteration_rows(
+                matrix_a.key,
+                np.ascontiguousarray(vector_b, dtype=np.float64).reshape(N),
+                N, epsilon, matrix_a.partition, overlap)
+
         tau = .0001 / N
         last_iter_measure = None
         vector_x = np.full((N, 1), 0)
@@ -56,16 +281,1062 @@ class SLESolver:
 
         return vector_x
 
+    @classmethod
+    def conjugate_gradient(
+        cls,
+        matrix_a: np.matrix[float, float] | CSRMatrix | DistributedMatrix,
+        vector_b: np.ndarray[None, float],
+        epsilon: float = 1e-10,
+        preconditioner: str | None = None,
+        max_iter: int | None = None,
+        matvec=None,
+    ) -> (np.ndarray[float, float] | None):
+        return cls.__krylov(cls.__conjugate_gradient, matrix_a, vector_b,
+                            epsilon, preconditioner, max_iter, matvec)
+
+    @classmethod
+    def bicgstab(
+        cls,
+        matrix_a: np.matrix[float, float] | CSRMatrix | DistributedMatrix,
+        vector_b: np.ndarray[None, float],
+        epsilon: float = 1e-10,
+        preconditioner: str | None = None,
+        max_iter: int | None = None,
+        matvec=None,
+    ) -> (np.ndarray[float, float] | None):
+        return cls.__krylov(cls.__bicgstab, matrix_a, vector_b,
+                            epsilon, preconditioner, max_iter, matvec)
+
+    @classmethod
+    def gmres(
+        cls,
+        matrix_a: np.matrix[float, float] | CSRMatrix | DistributedMatrix,
+        vector_b: np.ndarray[None, float],
+        epsilon: float = 1e-10,
+        preconditioner: str | None = None,
+        max_iter: int | None = None,
+        matvec=None,
+        restart: int = 30,
+    ) -> (np.ndarray[float, float] | None):
+        assert restart > 0
+        return cls.__krylov(cls.__gmres, matrix_a, vector_b,
+                            epsilon, preconditioner, max_iter, matvec,
+                            restart)
+
+    @classmethod
+    def __krylov(
+        cls,
+        method,
+        matrix_a: np.matrix[float, float] | CSRMatrix | DistributedMatrix,
+        vector_b: np.ndarray[None, float],
+        epsilon: float,
+        preconditioner: str | None,
+        max_iter: int | None,
+        matvec,
+        *args,
+    ) -> (np.ndarray[float, float] | None):
+
+        N = vector_b.shape[0]
+        assert matrix_a.shape == (N, N)
+        assert vector_b.shape == (N, 1)
+
+        if matvec is None:
+            matvec = mpi_matrix_dot
+        if max_iter is None:
+            max_iter = 10 * N
+
+        if (matvec is mpi_matrix_dot and size > 1 and
+                not isinstance(matrix_a, DistributedMatrix)):
+            with mpi_distributed_matrix(matrix_a) as distributed_a:
+                return cls.__krylov(method, distributed_a, vector_b, epsilon,
+                                    preconditioner, max_iter, matvec, *args)
+
+        def dot(vector_x):
+            return np.asarray(matvec(matrix_a, vector_x),
+                              dtype=np.float64).reshape(N, 1)
+
+        return method(dot, cls.__preconditioner(matrix_a, preconditioner),
+                      np.array(vector_b, dtype=np.float64), epsilon,
+                      max_iter, *args)
+
+    @classmethod
+    def __preconditioner(
+        cls,
+        matrix_a: np.matrix[float, float] | CSRMatrix | DistributedMatrix,
+        preconditioner: str | None,
+    ):
+        match preconditioner:
+            case None:
+                return lambda vector_r: vector_r
+            case "jacobi":
+                diagonal = matrix_diagonal(matrix_a).reshape(-1, 1)
+                assert np.all(diagonal != 0)
+                return lambda vector_r: vector_r / diagonal
+            case _:
+                raise ValueError(f"Unknown preconditioner: {preconditioner}")
+
+    @classmethod
+    def __conjugate_gradient(
+        cls,
+        dot,
+        precondition,
+        vector_b: np.ndarray[None, float],
+        epsilon: float,
+        max_iter: int,
+    ) -> (np.ndarray[float, float] | None):
+
+        vector_b_norm = np.linalg.norm(vector_b)
+        vector_x = np.zeros_like(vector_b)
+        if vector_b_norm == 0:
+            return vector_x
+
+        vector_r = vector_b.copy()
+        vector_z = precondition(vector_r)
+        vector_p = vector_z.copy()
+        rz = np.vdot(vector_r, vector_z)
+        for _ in range(max_iter):
+            if np.linalg.norm(vector_r) / vector_b_norm < epsilon:
+                return vector_x
+
+            vector_ap = dot(vector_p)
+            pap = np.vdot(vector_p, vector_ap)
+            if pap == 0:
+                return None
+            alpha = rz / pap
+
+            vector_x += alpha * vector_p
+            vector_r -= alpha * vector_ap
+
+            vector_z = precondition(vector_r)
+            rz, last_rz = np.vdot(vector_r, vector_z), rz
+            vector_p = vector_z + (rz / last_rz) * vector_p
+
+        if np.linalg.norm(vector_r) / vector_b_norm < epsilon:
+            return vector_x
+        return None
+
+    @classmethod
+    def __bicgstab(
+        cls,
+        dot,
+        precondition,
+        vector_b: np.ndarray[None, float],
+        epsilon: float,
+        max_iter: int,
+    ) -> (np.ndarray[float, float] | None):
+
+        vector_b_norm = np.linalg.norm(vector_b)
+        vector_x = np.zeros_like(vector_b)
+        if vector_b_norm == 0:
+            return vector_x
+
+        vector_r = vector_b.copy()
+        vector_r_hat = vector_r.copy()
+        vector_p = np.zeros_like(vector_b)
+        vector_v = np.zeros_like(vector_b)
+        rho = alpha = omega = 1.
+        for _ in range(max_iter):
+            if np.linalg.norm(vector_r) / vector_b_norm < epsilon:
+                return vector_x
+
+            rho, last_rho = np.vdot(vector_r_hat, vector_r), rho
+            if rho == 0 or omega == 0:
+                return None
+
+            beta = (rho / last_rho) * (alpha / omega)
+            vector_p = vector_r + beta * (vector_p - omega * vector_v)
+            vector_p_hat = precondition(vector_p)
+            vector_v = dot(vector_p_hat)
+            alpha = rho / np.vdot(vector_r_hat, vector_v)
+
+            vector_s = vector_r - alpha * vector_v
+            if np.linalg.norm(vector_s) / vector_b_norm < epsilon:
+                return vector_x + alpha * vector_p_hat
+
+            vector_s_hat = precondition(vector_s)
+            vector_t = dot(vector_s_hat)
+            omega = np.vdot(vector_t, vector_s) / np.vdot(vector_t, vector_t)
+
+            vector_x += alpha * vector_p_hat + omega * vector_s_hat
+            vector_r = vector_s - omega * vector_t
+
+        if np.linalg.norm(vector_r) / vector_b_norm < epsilon:
+            return vector_x
+        return None
+
+    @classmethod
+    def __gmres(
+        cls,
+        dot,
+        precondition,
+        vector_b: np.ndarray[None, float],
+        epsilon: float,
+        max_iter: int,
+        restart: int,
+        best_effort: bool = False,
+    ) -> (np.ndarray[float, float] | None):
+
+        # best_effort returns the last iterate even if it misses epsilon.
+        N = vector_b.shape[0]
+        vector_b_norm = np.linalg.norm(vector_b)
+        vector_x = np.zeros_like(vector_b)
+        if vector_b_norm == 0:
+            return vector_x
+
+        iterations = 0
+        while iterations < max_iter:
+            vector_r = vector_b - dot(vector_x)
+            beta = np.linalg.norm(vector_r)
+            if beta / vector_b_norm < epsilon:
+                return vector_x
+
+            # Arnoldi basis with right preconditioning; the Hessenberg
+            # matrix is kept triangular by Givens rotations, so g[j + 1] is
+            # the residual norm of the current least-squares solution.
+            m = min(restart, max_iter - iterations)
+            basis = np.zeros((N, m + 1))
+            hessenberg = np.zeros((m + 1, m))
+            cs, sn = np.zeros(m), np.zeros(m)
+            g = np.zeros(m + 1)
+            g[0] = beta
+            basis[:, 0] = vector_r[:, 0] / beta
+
+            k = 0
+            for j in range(m):
+                vector_w = dot(precondition(basis[:, j: j + 1]))[:, 0]
+                for i in range(j + 1):
+                    hessenberg[i, j] = np.vdot(vector_w, basis[:, i])
+                    vector_w -= hessenberg[i, j] * basis[:, i]
+                hessenberg[j + 1, j] = np.linalg.norm(vector_w)
+                if hessenberg[j + 1, j] != 0:
+                    basis[:, j + 1] = vector_w / hessenberg[j + 1, j]
+
+                for i in range(j):
+                    h_top, h_bottom = hessenberg[i, j], hessenberg[i + 1, j]
+                    hessenberg[i, j] = cs[i] * h_top + sn[i] * h_bottom
+                    hessenberg[i + 1, j] = -sn[i] * h_top + cs[i] * h_bottom
+                radius = np.hypot(hessenberg[j, j], hessenberg[j + 1, j])
+                if radius == 0:
+                    break
+                cs[j] = hessenberg[j, j] / radius
+                sn[j] = hessenberg[j + 1, j] / radius
+                hessenberg[j, j], hessenberg[j + 1, j] = radius, 0.
+                g[j], g[j + 1] = cs[j] * g[j], -sn[j] * g[j]
+
+                k = j + 1
+                iterations += 1
+                if abs(g[k]) / vector_b_norm < epsilon:
+                    break
+
+            if k == 0:
+                return vector_x if best_effort else None
+
+            y = np.linalg.solve(hessenberg[:k, :k], g[:k])
+            vector_x += precondition(basis[:, :k] @ y.reshape(k, 1))
+
+        if (best_effort or np.linalg.norm(vector_b - dot(vector_x)) /
+                vector_b_norm < epsilon):
+            return vector_x
+        return None
+
 
 def matrix_dot(
-    matrix_a: np.matrix[float, float],
+    matrix_a: np.matrix[float, float] | CSRMatrix,
     vector_x: np.ndarray[None, float],
 ) -> np.ndarray[None, float]:
+    if local_backend == "openmp":
+        if not isinstance(matrix_a, CSRMatrix):
+            matrix_a = np.ascontiguousarray(
+                matrix_a,
+                dtype=np.float32 if matrix_a.dtype == np.float32
+                else np.float64)
+        return local_dot(matrix_a, vector_x)
+    if isinstance(matrix_a, CSRMatrix):
+        return matrix_a @ vector_x
+    if matrix_a.dtype == np.float32:
+        # Otherwise NumPy would upcast the whole float32 copy of A.
+        vector_x = np.asarray(vector_x, dtype=np.float32)
     return np.dot(matrix_a, vector_x)
 
 
+def local_dot(
+    matrix_block: np.ndarray[float, float] | CSRMatrix,
+    vector_x: np.ndarray[None, float],
+) -> np.ndarray[None, float]:
+
+    # matrix_block is C-contiguous float64, or float32 after mpi_astype;
+    # x is a flat buffer or an (N, k) block of right-hand sides and is
+    # brought to the block's dtype for the kernels.
+    if local_backend == "numpy":
+        return matrix_block @ vector_x
+
+    vector_x = np.ascontiguousarray(vector_x, dtype=matrix_block.dtype)
+    result = np.empty((matrix_block.shape[0], *vector_x.shape[1:]),
+                      dtype=matrix_block.dtype)
+    if not isinstance(matrix_block, CSRMatrix):
+        OpenMP_funcs.openmp_matrix_dot(
+            matrix_block, vector_x, num_threads, result)
+        return result
+
+    # The CSR kernel takes one right-hand side at a time.
+    columns = vector_x.reshape(vector_x.shape[0], -1)
+    product = np.empty(matrix_block.shape[0])
+    for column in range(columns.shape[1]):
+        OpenMP_funcs.openmp_csr_matrix_dot(
+            matrix_block.indptr, matrix_block.indices, matrix_block.data,
+            np.ascontiguousarray(columns[:, column]), num_threads, product)
+        result.reshape(matrix_block.shape[0], -1)[:, column] = product
+    return result
+
+
+def check_local_backend(
+    backend: str,
+    threads: int | None,
+    pipeline: int | None = PIPELINE_BYTES,
+) -> None:
+    match backend:
+        case "numpy":
+            pass
+        case "openmp":
+            if OpenMP_funcs is None:
+                raise ImportError(
+                    "backend='openmp' needs the OpenMP_funcs extension "
+                    "from lab3")
+        case _:
+            raise ValueError(f"Unknown backend: {backend}")
+
+    assert threads is None or threads > 0
+    assert pipeline is None or pipeline > 0
+
+
+def set_local_backend(
+    backend: str,
+    threads: int | None,
+    pipeline: int | None = PIPELINE_BYTES,
+) -> None:
+    global local_backend, num_threads, pipeline_bytes
+
+    check_local_backend(backend, threads, pipeline)
+    if threads is None:
+        # Collective: the cores of a node are shared evenly by its ranks.
+        node_comm = comm.Split_type(MPI.COMM_TYPE_SHARED)
+        threads = max(1, (os.cpu_count() or 1) // node_comm.Get_size())
+        node_comm.Free()
+
+    local_backend = backend
+    num_threads = threads if backend == "openmp" else 1
+    pipeline_bytes = pipeline
+
+
+def mpi_set_local_backend(
+    backend: str = "numpy",
+    threads: int | None = None,
+    pipeline: int | None = PIPELINE_BYTES,
+) -> None:
+    # Checked on the root first, so a bad request raises here instead of
+    # inside the worker loops.
+    check_local_backend(backend, threads, pipeline)
+
+    if size > 1:
+        comm.bcast(("backend", (backend, threads, pipeline)), root=0)
+    set_local_backend(backend, threads, pipeline)
+
+
+def mpi_pipeline_chunks(matrix_a: DistributedMatrix) -> int:
+    # Decided on the root for every rank, since their collectives must
+    # match. The OpenMP and CSR kernels need all of x at once; dense NumPy
+    # blocks take column slices without a copy and can follow the pipeline.
+    matrix_block = _matrix_blocks[matrix_a.key]
+    if (pipeline_bytes is None or local_backend != "numpy" or
+            isinstance(matrix_block, CSRMatrix)):
+        return 1
+
+    block_bytes = (int(matrix_a.partition.counts.max()) *
+                   matrix_a.shape[1] * matrix_block.dtype.itemsize)
+    return max(1, min(PIPELINE_MAX_CHUNKS, matrix_a.shape[1],
+                      block_bytes // pipeline_bytes))
+
+
+def matrix_diagonal(
+    matrix_a: np.matrix[float, float] | CSRMatrix | DistributedMatrix,
+) -> np.ndarray[None, float]:
+    if isinstance(matrix_a, DistributedMatrix):
+        return matrix_a.diagonal
+    if isinstance(matrix_a, CSRMatrix):
+        return matrix_a.diagonal()
+    return np.asarray(matrix_a).diagonal()
+
+
+def mpi_row_partition(
+    matrix_a: np.matrix[float, float] | CSRMatrix,
+    distribution: str = "block",
+    row_costs: np.ndarray[None, float] | None = None,
+) -> RowPartition:
+
+    match distribution:
+        case "block":
+            return block_partition(matrix_a.shape[0], size)
+        case "cyclic":
+            return cyclic_partition(matrix_a.shape[0], size)
+        case "weighted":
+            if row_costs is None and isinstance(matrix_a, CSRMatrix):
+                row_costs = matrix_a.row_nnz()
+            elif row_costs is None:
+                row_costs = np.count_nonzero(np.asarray(matrix_a), axis=1)
+            return weighted_partition(row_costs, size)
+        case _:
+            raise ValueError(f"Unknown distribution: {distribution}")
+
+
+def mpi_scatter_rows(
+    matrix_a: np.ndarray[float, float] | None,
+    shape: tuple[int, int],
+    partition: RowPartition,
+) -> np.ndarray[float, float]:
+
+    # Collective: every rank receives its own row block, the root included.
+    if worker == 0 and partition.order is not None:
+        matrix_a = matrix_a[partition.order]
+
+    matrix_block = np.empty((partition.counts[worker], shape[1]))
+    comm.Scatterv(
+        [matrix_a, partition.counts * shape[1], partition.displs * shape[1],
+         MPI.DOUBLE] if worker == 0 else None,
+        matrix_block, root=0)
+
+    return matrix_block
+
+
+def mpi_scatter_csr_rows(
+    matrix_a: CSRMatrix | None,
+    shape: tuple[int, int],
+    partition: RowPartition,
+    nnz_counts: np.ndarray[None, int],
+) -> CSRMatrix:
+
+    # Collective: the nonzeros per row and the column indices and values
+    # of every rank's rows go out in three Scatterv calls.
+    if worker == 0 and partition.order is not None:
+        matrix_a = matrix_a.take_rows(partition.order)
+
+    row_nnz = np.empty(partition.counts[worker], dtype=np.int64)
+    comm.Scatterv(
+        [matrix_a.row_nnz(), partition.counts, partition.displs,
+         MPI.INT64_T] if worker == 0 else None,
+        row_nnz, root=0)
+
+    nnz_displs = private_displs(nnz_counts)
+    indices = np.empty(nnz_counts[worker], dtype=np.int64)
+    comm.Scatterv(
+        [matrix_a.indices, nnz_counts, nnz_displs, MPI.INT64_T]
+        if worker == 0 else None,
+        indices, root=0)
+    data = np.empty(nnz_counts[worker])
+    comm.Scatterv(
+        [matrix_a.data, nnz_counts, nnz_displs, MPI.DOUBLE]
+        if worker == 0 else None,
+        data, root=0)
+
+    return CSRMatrix(np.concatenate(([0], np.cumsum(row_nnz))),
+                     indices, data, (row_nnz.shape[0], shape[1]))
+
+
+def mpi_read_rows(
+    path: str,
+    shape: tuple[int, int] | None,
+    partition: RowPartition,
+) -> tuple[np.ndarray[float, float], np.ndarray[None, float] | None]:
+
+    # Collective: every rank copies only its own rows out of the mapping,
+    # so the root never reads the rest of the file; the diagonal for the
+    # Jacobi preconditioner is gathered to the root.
+    matrix_a = open_matrix(path, shape)
+    rows = np.arange(matrix_a.shape[0])[partition.rows(worker)]
+    matrix_block = np.array(matrix_a[rows], dtype=np.float64)
+    del matrix_a
+
+    diagonal = np.empty(partition.counts.sum()) if worker == 0 else None
+    comm.Gatherv(
+        matrix_block[np.arange(rows.shape[0]), rows],
+        [diagonal, partition.counts, partition.displs, MPI.DOUBLE]
+        if worker == 0 else None,
+        root=0)
+
+    if worker == 0 and partition.order is not None:
+        diagonal[partition.order] = diagonal.copy()
+
+    return matrix_block, diagonal
+
+
+def mpi_dot_rows(
+    key: int,
+    vector_x: np.ndarray[None, float] | None,
+    N: int,
+    chunks: int,
+    partition: RowPartition | None = None,
+) -> (np.ndarray[None, float] | None):
+
+    # Collective: x is broadcast, every rank multiplies its row block and
+    # the partial results are gathered straight into the root's buffer.
+    start = time.perf_counter()
+    matrix_block = _matrix_blocks[key]
+
+    # A float32 block (mpi_astype) halves the bytes of x and of the result.
+    dtype = matrix_block.dtype
+    mpi_type = MPI.FLOAT if dtype == np.float32 else MPI.DOUBLE
+    if worker != 0:
+        vector_x = np.empty(N, dtype=dtype)
+    else:
+        vector_x = vector_x.astype(dtype, copy=False)
+
+    compute_time = 0.
+    if chunks == 1:
+        comm.Bcast(vector_x, root=0)
+
+        compute_start = time.perf_counter()
+        vector_b = local_dot(matrix_block, vector_x)
+        compute_time = time.perf_counter() - compute_start
+    else:
+        column_partition = block_partition(N, chunks)
+        columns = [column_partition.rows(chunk) for chunk in range(chunks)]
+        requests = [comm.Ibcast(vector_x[cols], root=0) for cols in columns]
+
+        # Chunks are added in arrival order, not in column order.
+        vector_b = np.zeros(matrix_block.shape[0], dtype=dtype)
+        for _ in columns:
+            cols = columns[MPI.Request.Waitany(requests)]
+
+            compute_start = time.perf_counter()
+            vector_b += matrix_block[:, cols] @ vector_x[cols]
+            compute_time += time.perf_counter() - compute_start
+
+    result = np.empty(N, dtype=dtype) if worker == 0 else None
+    comm.Gatherv(
+        vector_b,
+        [result, partition.counts, partition.displs, mpi_type]
+        if worker == 0 else None,
+        root=0)
+
+    record_rank_timings(matrix_block.shape[0], start, compute_time)
+
+    if worker == 0 and partition.order is not None:
+        result[partition.order] = result.copy()
+
+    return result
+
+
+def record_rank_timings(
+    rows: int,
+    start: float,
+    compute_time: float,
+    calls: int = 1,
+) -> None:
+    # Everything since start that was not compute counts as communication.
+    _rank_timings["rows"] = rows
+    _rank_timings["calls"] += calls
+    _rank_timings["compute"] += compute_time
+    _rank_timings["communication"] += \
+        time.perf_counter() - start - compute_time
+
+
+def mpi_simple_iteration_rows(
+    key: int,
+    vector_b: np.ndarray[None, float] | None,
+    N: int,
+    epsilon: float,
+    partition: RowPartition,
+    overlap: bool = False,
+) -> (np.ndarray[None, float] | None):
+
+    # Collective: every rank keeps the full x and its rows of A and b. One
+    # pass over the local rows yields both the residual for the update and
+    # its squared norm; a single Allreduce turns that into the stop measure
+    # on all ranks, and Allgatherv shares the updated rows of x. x is never
+    # broadcast here, so the matvec pipeline has nothing to chunk; with
+    # overlap (mpi_pipeline_chunks > 1) the Allgatherv runs nonblocking
+    # while each rank multiplies the columns of its own new rows.
+    if worker == 0 and partition.order is not None:
+        vector_b = vector_b[partition.order]
+
+    vector_b_block = np.empty(partition.counts[worker])
+    comm.Scatterv(
+        [vector_b, partition.counts, partition.displs, MPI.DOUBLE]
+        if worker == 0 else None,
+        vector_b_block, root=0)
+
+    squared_norm = np.empty(1)
+    comm.Allreduce(np.array([vector_b_block @ vector_b_block]), squared_norm)
+    vector_b_norm = np.sqrt(squared_norm[0])
+
+    matrix_block = _matrix_blocks[key]
+    rows = partition.rows(worker)
+    # The own columns split off as one slice only for contiguous rows.
+    overlap = overlap and partition.order is None
+
+    tau = .0001 / N
+    last_iter_measure = None
+    vector_x = np.zeros(N)
+    gathered_x = np.empty(N)
+
+    # Every iteration is one matvec: the time from one residual to the
+    # next, the Allreduce and the exchange of x included.
+    start = time.perf_counter()
+    residual = local_dot(matrix_block, vector_x) - vector_b_block
+    record_rank_timings(matrix_block.shape[0], start,
+                        time.perf_counter() - start)
+    for _ in iter(int, 1):
+        start = time.perf_counter()
+        comm.Allreduce(np.array([residual @ residual]), squared_norm)
+        actual_iter_measure = np.sqrt(squared_norm[0]) / vector_b_norm
+        if actual_iter_measure < epsilon:
+            record_rank_timings(matrix_block.shape[0], start, 0., calls=0)
+            break
+
+        if (last_iter_measure is not None and
+                actual_iter_measure > last_iter_measure):
+            if tau < 0:
+                record_rank_timings(matrix_block.shape[0], start, 0.,
+                                    calls=0)
+                return None
+            tau *= -1
+
+        updated_rows = vector_x[rows] - residual * tau
+        if overlap:
+            request = comm.Iallgatherv(
+                updated_rows,
+                [gathered_x, partition.counts, partition.displs, MPI.DOUBLE])
+            compute_start = time.perf_counter()
+            own_part = matrix_block[:, rows] @ updated_rows
+            compute_time = time.perf_counter() - compute_start
+            request.Wait()
+            vector_x, gathered_x = gathered_x, vector_x
+
+            compute_start = time.perf_counter()
+            residual = (own_part +
+                        matrix_block[:, :rows.start] @ vector_x[:rows.start] +
+                        matrix_block[:, rows.stop:] @ vector_x[rows.stop:] -
+                        vector_b_block)
+            compute_time += time.perf_counter() - compute_start
+        else:
+            comm.Allgatherv(
+                updated_rows,
+                [gathered_x, partition.counts, partition.displs, MPI.DOUBLE])
+            if partition.order is None:
+                vector_x, gathered_x = gathered_x, vector_x
+            else:
+                vector_x[partition.order] = gathered_x
+
+            compute_start = time.perf_counter()
+            residual = local_dot(matrix_block, vector_x) - vector_b_block
+            compute_time = time.perf_counter() - compute_start
+        record_rank_timings(matrix_block.shape[0], start, compute_time)
+        last_iter_measure = actual_iter_measure
+
+    return vector_x.reshape(N, 1) if worker == 0 else None
+
+
+def block_simple_iteration(
+    residual,
+    update,
+    vector_b_norms: np.ndarray[None, float],
+    tau: float,
+    epsilon: float,
+) -> np.ndarray[None, bool]:
+
+    # The simple iteration of __simple_iteration run on every column at
+    # once: each column keeps its own tau, sign flip and stop measure.
+    # residual(columns) returns those columns of A X - B (the local rows)
+    # and their full squared norms; update(columns, R, tau) applies
+    # X -= R * tau to them. Returns which columns diverged.
+    k = vector_b_norms.shape[0]
+    tau = np.full(k, tau)
+    last_iter_measure = np.full(k, np.inf)
+    active = np.ones(k, dtype=bool)
+    failed = np.zeros(k, dtype=bool)
+
+    while active.any():
+        columns = np.flatnonzero(active)
+        vectors_r, squared_norms = residual(columns)
+        actual_iter_measure = np.sqrt(squared_norms) / vector_b_norms[columns]
+
+        done = actual_iter_measure < epsilon
+        rising = ~done & (actual_iter_measure > last_iter_measure[columns])
+        diverged = rising & (tau[columns] < 0)
+        tau[columns[rising & ~diverged]] *= -1
+
+        stepping = ~done & ~diverged
+        if stepping.any():
+            update(columns[stepping], vectors_r[:, stepping],
+                   tau[columns[stepping]])
+
+        last_iter_measure[columns] = actual_iter_measure
+        failed[columns[diverged]] = True
+        active[columns[~stepping]] = False
+
+    return failed
+
+
+def mpi_simple_iteration_block_rows(
+    key: int,
+    vectors_b: np.ndarray[float, float] | None,
+    N: int,
+    k: int,
+    epsilon: float,
+    partition: RowPartition,
+) -> (np.ndarray[float, float] | None):
+
+    # Collective: mpi_simple_iteration_rows for k columns. The column
+    # norms share one Allreduce and the updated rows of X one Allgatherv,
+    # so the message count does not grow with k.
+    if worker == 0 and partition.order is not None:
+        vectors_b = vectors_b[partition.order]
+
+    vectors_b_block = np.empty((partition.counts[worker], k))
+    comm.Scatterv(
+        [vectors_b, partition.counts * k, partition.displs * k, MPI.DOUBLE]
+        if worker == 0 else None,
+        vectors_b_block, root=0)
+
+    vector_b_norms = np.empty(k)
+    comm.Allreduce((vectors_b_block * vectors_b_block).sum(axis=0),
+                   vector_b_norms)
+    vector_b_norms = np.sqrt(vector_b_norms)
+
+    matrix_block = _matrix_blocks[key]
+    rows = partition.rows(worker)
+    vectors_x = np.zeros((N, k))
+
+    # One call per A @ X; the Allgatherv of update counts as its
+    # communication.
+    def residual(columns):
+        start = time.perf_counter()
+        vectors_r = local_dot(
+            matrix_block, np.ascontiguousarray(vectors_x[:, columns])) - \
+            vectors_b_block[:, columns]
+        compute_time = time.perf_counter() - start
+        squared_norms = np.empty(columns.shape[0])
+        comm.Allreduce((vectors_r * vectors_r).sum(axis=0), squared_norms)
+        record_rank_timings(matrix_block.shape[0], start, compute_time)
+        return vectors_r, squared_norms
+
+    def update(columns, vectors_r, tau):
+        start = time.perf_counter()
+        width = columns.shape[0]
+        updated_rows = vectors_x[rows][:, columns] - vectors_r * tau
+        gathered_x = np.empty((N, width))
+        comm.Allgatherv(
+            np.ascontiguousarray(updated_rows),
+            [gathered_x, partition.counts * width, partition.displs * width,
+             MPI.DOUBLE])
+        if partition.order is None:
+            vectors_x[:, columns] = gathered_x
+        else:
+            vectors_x[np.ix_(partition.order, columns)] = gathered_x
+        record_rank_timings(matrix_block.shape[0], start, 0., calls=0)
+
+    failed = block_simple_iteration(
+        residual, update, vector_b_norms, .0001 / N, epsilon)
+
+    if worker != 0:
+        return None
+    vectors_x[:, failed] = np.nan
+    return vectors_x
+
+
+def mpi_scatter_matrix(
+    matrix_a: np.matrix[float, float] | CSRMatrix,
+    distribution: str = "block",
+    row_costs: np.ndarray[None, float] | None = None,
+) -> (DistributedMatrix | np.matrix[float, float] | CSRMatrix):
+
+    # A single rank multiplies locally, so there is nothing to distribute.
+    if size == 1:
+        return matrix_a
+
+    key = next(_matrix_keys)
+    partition = mpi_row_partition(matrix_a, distribution, row_costs)
+
+    if isinstance(matrix_a, CSRMatrix):
+        # Ranks need their nonzero counts up front to size the Scatterv.
+        row_nnz = matrix_a.row_nnz()
+        if partition.order is not None:
+            row_nnz = row_nnz[partition.order]
+        running_nnz = np.concatenate(([0], np.cumsum(row_nnz)))
+        nnz_counts = (running_nnz[partition.displs + partition.counts] -
+                      running_nnz[partition.displs])
+
+        comm.bcast(("load_csr", (key, matrix_a.shape, partition, nnz_counts)),
+                   root=0)
+        _matrix_blocks[key] = mpi_scatter_csr_rows(
+            matrix_a, matrix_a.shape, partition, nnz_counts)
+        return DistributedMatrix(key, matrix_a.shape, partition,
+                                 matrix_a.diagonal())
+
+    comm.bcast(("load", (key, matrix_a.shape, partition)), root=0)
+    _matrix_blocks[key] = mpi_scatter_rows(
+        np.ascontiguousarray(matrix_a, dtype=np.float64),
+        matrix_a.shape, partition)
+
+    return DistributedMatrix(key, matrix_a.shape, partition,
+                             np.asarray(matrix_a).diagonal().copy())
+
+
+def mpi_astype(
+    matrix_a: DistributedMatrix | np.matrix[float, float] | CSRMatrix,
+    dtype: type,
+) -> (DistributedMatrix | np.ndarray[float, float] | CSRMatrix):
+
+    # Every rank converts the rows it already holds, so nothing is sent;
+    # the result is a new matrix to be freed on its own. CSR values stay
+    # float64 since the int64 indices dominate their traffic anyway.
+    if isinstance(matrix_a, CSRMatrix):
+        return matrix_a
+    if not isinstance(matrix_a, DistributedMatrix):
+        return np.ascontiguousarray(matrix_a, dtype=dtype)
+    if isinstance(_matrix_blocks[matrix_a.key], CSRMatrix):
+        return matrix_a
+
+    key = next(_matrix_keys)
+    comm.bcast(("astype", (matrix_a.key, key, dtype)), root=0)
+    _matrix_blocks[key] = _matrix_blocks[matrix_a.key].astype(dtype)
+
+    return DistributedMatrix(key, matrix_a.shape, matrix_a.partition,
+                             matrix_a.diagonal)
+
+
+def open_matrix(
+    path: str,
+    shape: tuple[int, int] | None = None,
+) -> np.ndarray[float, float]:
+    # A .npy file carries its own header; any other file is read as raw
+    # C-ordered float64 of the given shape. Both stay on disk until rows
+    # are touched.
+    if shape is None:
+        return np.load(path, mmap_mode="r")
+    return np.memmap(path, dtype=np.float64, mode="r", shape=shape)
+
+
+def mpi_load_matrix(
+    path: str,
+    shape: tuple[int, int] | None = None,
+    distribution: str = "block",
+    row_costs: np.ndarray[None, float] | None = None,
+) -> (DistributedMatrix | np.ndarray[float, float]):
+
+    # Every rank maps the same file, so it must be on a shared filesystem.
+    # "weighted" without row_costs scans the whole file on the root.
+    matrix_a = open_matrix(path, shape)
+    assert matrix_a.shape[0] == matrix_a.shape[1]
+
+    if size == 1:
+        return matrix_a
+
+    key = next(_matrix_keys)
+    partition = mpi_row_partition(matrix_a, distribution, row_costs)
+
+    comm.bcast(("load_file", (key, path, shape, partition)), root=0)
+    _matrix_blocks[key], diagonal = mpi_read_rows(path, shape, partition)
+
+    return DistributedMatrix(key, matrix_a.shape, partition, diagonal)
+
+
+def mpi_rank_timings(reset: bool = False) -> list[dict]:
+    if size > 1:
+        comm.bcast(("timings", reset), root=0)
+    return mpi_gather_timings(reset)
+
+
+def mpi_gather_timings(reset: bool) -> list[dict] | None:
+    timings = comm.gather({"rank": worker, **_rank_timings}, root=0)
+    if reset:
+        _rank_timings.update(calls=0, compute=0., communication=0.)
+    return timings
+
+
+@contextmanager
+def mpi_distributed_matrix(
+    matrix_a: np.matrix[float, float] | CSRMatrix | DistributedMatrix,
+):
+    # A plain matrix is scattered for one call and freed after it, so
+    # changes made to it in place are seen by the next call. Rows that
+    # should stay on the ranks between calls are kept by passing the
+    # DistributedMatrix from mpi_scatter_matrix or mpi_load_matrix.
+    if size == 1 or isinstance(matrix_a, DistributedMatrix):
+        yield matrix_a
+        return
+
+    distributed_a = mpi_scatter_matrix(matrix_a)
+    try:
+        yield distributed_a
+    finally:
+        mpi_free_matrix(distributed_a)
+
+
+def mpi_free_matrix(
+    matrix_a: DistributedMatrix | np.matrix[float, float] | CSRMatrix,
+) -> None:
+    if not isinstance(matrix_a, DistributedMatrix):
+        return
+
+    comm.bcast(("free", matrix_a.key), root=0)
+    del _matrix_blocks[matrix_a.key]
+
+
+def mpi_scatter_vector_rows(
+    key: int,
+    vector_x: np.ndarray[None, float] | None,
+    partition: RowPartition,
+) -> None:
+
+    # Collective: a vector is split into the same rows as the matrices.
+    if worker == 0 and partition.order is not None:
+        vector_x = vector_x[partition.order]
+
+    _vector_blocks[key] = np.empty(partition.counts[worker])
+    comm.Scatterv(
+        [vector_x, partition.counts, partition.displs, MPI.DOUBLE]
+        if worker == 0 else None,
+        _vector_blocks[key], root=0)
+
+
+def mpi_gather_vector_rows(
+    key: int,
+    partition: RowPartition,
+) -> (np.ndarray[None, float] | None):
+
+    result = np.empty(partition.counts.sum()) if worker == 0 else None
+    comm.Gatherv(
+        _vector_blocks[key],
+        [result, partition.counts, partition.displs, MPI.DOUBLE]
+        if worker == 0 else None,
+        root=0)
+
+    if worker == 0 and partition.order is not None:
+        result[partition.order] = result.copy()
+
+    return result
+
+
+def mpi_matvec_rows(
+    matrix_key: int,
+    vector_key: int,
+    result_key: int,
+    partition: RowPartition,
+) -> None:
+
+    # Collective: the rows of x are shared with Allgatherv, then every rank
+    # fills its own rows of the result, which stays distributed.
+    start = time.perf_counter()
+    vector_x = np.empty(partition.counts.sum())
+    comm.Allgatherv(
+        _vector_blocks[vector_key],
+        [vector_x, partition.counts, partition.displs, MPI.DOUBLE])
+    if partition.order is not None:
+        vector_x[partition.order] = vector_x.copy()
+
+    compute_start = time.perf_counter()
+    _vector_blocks[result_key] = local_dot(_matrix_blocks[matrix_key],
+                                           vector_x)
+    record_rank_timings(_matrix_blocks[matrix_key].shape[0], start,
+                        time.perf_counter() - compute_start)
+
+
+def mpi_axpy_rows(alpha: float, x_key: int, y_key: int) -> None:
+    _vector_blocks[y_key] += alpha * _vector_blocks[x_key]
+
+
+def mpi_vector_dot_rows(x_key: int, y_key: int) -> float:
+    result = np.empty(1)
+    comm.Allreduce(
+        np.array([_vector_blocks[x_key] @ _vector_blocks[y_key]]), result)
+    return result[0]
+
+
+def mpi_scatter_vector(
+    vector_x: np.ndarray[None, float],
+    partition: RowPartition | None = None,
+) -> DistributedVector:
+
+    # Vectors default to the rows of a block-distributed matrix; pass
+    # DistributedMatrix.partition to pair them with another layout.
+    N = vector_x.shape[0]
+    if partition is None:
+        partition = block_partition(N, size)
+
+    key = next(_matrix_keys)
+    if size > 1:
+        comm.bcast(("load_vector", (key, partition)), root=0)
+    mpi_scatter_vector_rows(
+        key, np.ascontiguousarray(vector_x, dtype=np.float64).reshape(N),
+        partition)
+
+    return DistributedVector(key, (N, 1), partition)
+
+
+def mpi_gather_vector(vector_x: DistributedVector) -> np.ndarray[None, float]:
+    if size > 1:
+        comm.bcast(("gather_vector", (vector_x.key, vector_x.partition)),
+                   root=0)
+    return mpi_gather_vector_rows(
+        vector_x.key, vector_x.partition).reshape(vector_x.shape)
+
+
+def mpi_free_vector(vector_x: DistributedVector) -> None:
+    if size > 1:
+        comm.bcast(("free_vector", vector_x.key), root=0)
+    del _vector_blocks[vector_x.key]
+
+
+def mpi_matvec(
+    matrix_a: np.matrix[float, float] | CSRMatrix | DistributedMatrix,
+    vector_x: DistributedVector,
+) -> DistributedVector:
+
+    N = vector_x.shape[0]
+    assert matrix_a.shape == (N, N)
+
+    if size > 1 and not isinstance(matrix_a, DistributedMatrix):
+        with mpi_distributed_matrix(matrix_a) as distributed_a:
+            return mpi_matvec(distributed_a, vector_x)
+
+    key = next(_matrix_keys)
+    if not isinstance(matrix_a, DistributedMatrix):
+        _vector_blocks[key] = matrix_dot(
+            matrix_a, _vector_blocks[vector_x.key].reshape(N, 1)).reshape(N)
+        return DistributedVector(key, (N, 1), vector_x.partition)
+
+    assert matrix_a.partition.same_rows(vector_x.partition)
+    comm.bcast(("matvec", (matrix_a.key, vector_x.key, key,
+                           vector_x.partition)), root=0)
+    mpi_matvec_rows(matrix_a.key, vector_x.key, key, vector_x.partition)
+
+    return DistributedVector(key, (N, 1), vector_x.partition)
+
+
+def mpi_axpy(
+    alpha: float,
+    vector_x: DistributedVector,
+    vector_y: DistributedVector,
+) -> None:
+    # y += alpha * x on every rank's own rows, without communication.
+    assert vector_x.partition.same_rows(vector_y.partition)
+    if size > 1:
+        comm.bcast(("axpy", (alpha, vector_x.key, vector_y.key)), root=0)
+    mpi_axpy_rows(alpha, vector_x.key, vector_y.key)
+
+
+def mpi_vector_dot(
+    vector_x: DistributedVector,
+    vector_y: DistributedVector,
+) -> float:
+    assert vector_x.partition.same_rows(vector_y.partition)
+    if size > 1:
+        comm.bcast(("vector_dot", (vector_x.key, vector_y.key)), root=0)
+    return mpi_vector_dot_rows(vector_x.key, vector_y.key)
+
+
 def mpi_matrix_dot(
-    matrix_a: np.matrix[float, float],
+    matrix_a: np.matrix[float, float] | CSRMatrix | DistributedMatrix,
     vector_x: np.ndarray[None, float],
 ) -> (np.ndarray[None, float] | None):
 
@@ -73,64 +1344,139 @@ def mpi_matrix_dot(
     assert matrix_a.shape == (N, N)
     assert vector_x.shape == (N, 1)
 
-    if size <= 2:
+    if size == 1:
         return matrix_dot(matrix_a, vector_x)
 
-    vector_b = np.zeros((N, 1))
+    if not isinstance(matrix_a, DistributedMatrix):
+        with mpi_distributed_matrix(matrix_a) as distributed_a:
+            return mpi_matrix_dot(distributed_a, vector_x)
 
-    step = max(N // (size - 1), 1) + 1
-    reqs, reqr = [], []
-    for i in range(1, size):
-        index = (i - 1) * step
-        reqs.append(comm.isend(
-            (matrix_a[index: index + step], vector_x), dest=i))
-        reqr.append(comm.irecv(source=i))
-    for i in range(size - 1):
-        reqs[i].wait()
-        index = i * step
-        vector_b[index: index + step] = reqr[i].wait()
+    chunks = mpi_pipeline_chunks(matrix_a)
+    comm.bcast(("dot", (matrix_a.key, N, chunks)), root=0)
+    vector_b = mpi_dot_rows(
+        matrix_a.key,
+        np.ascontiguousarray(vector_x, dtype=np.float64).reshape(N), N,
+        chunks, matrix_a.partition)
 
-    return vector_b
+    return vector_b.reshape(N, 1)
 
 
-comm = MPI.COMM_WORLD
-worker = comm.Get_rank()
-size = comm.Get_size()
-
-if worker != 0:
+def mpi_worker_loop() -> None:
     while True:
-        _matrix_a, _vector_x = comm.recv(source=0)
-        if _matrix_a is None:
-            exit()
-        comm.send(matrix_dot(_matrix_a, _vector_x), dest=0)
-
-_matrix_a = np.matrix([
-    [9.,  1.,  3., -7.,  9., -0., -9.,  7.],
-    [-8., 10., -3., -0., -4.,  1.,  1., -3.],
-    [-8.,  7.,  7., -0., -0., 10., -1., -0.],
-    [7., -5.,  5.,  9.,  1.,  1., -8., -4.],
-    [3., -3.,  8., -4.,  9.,  4.,  4.,  9.],
-    [9.,  6., -9.,  7.,  3., 10., -3., -6.],
-    [4., -8.,  8.,  2., -2., -2.,  9., 10.],
-    [-4., 10.,  1., -7., -2.,  8., -8.,  5.],
-])
-_vector_x = np.array([
-    [-3.],
-    [-9.],
-    [-2.],
-    [-6.],
-    [-1.],
-    [4.],
-    [-4.],
-    [5.],
-])
-_vector_b = mpi_matrix_dot(_matrix_a, _vector_x)
-_res_vector_x = SLESolver.simple_iteration(
-    _matrix_a,
-    _vector_b,
-)
-print(_vector_x)
-print(_res_vector_x)
+        command, payload = comm.bcast(None, root=0)
+        match command:
+            case "load":
+                key, shape, partition = payload
+                _matrix_blocks[key] = mpi_scatter_rows(
+                    None, shape, partition)
+            case "load_file":
+                key, path, shape, partition = payload
+                _matrix_blocks[key], _ = mpi_read_rows(path, shape, partition)
+            case "load_csr":
+                key, shape, partition, nnz_counts = payload
+                _matrix_blocks[key] = mpi_scatter_csr_rows(
+                    None, shape, partition, nnz_counts)
+            case "astype":
+                key, new_key, dtype = payload
+                _matrix_blocks[new_key] = _matrix_blocks[key].astype(dtype)
+            case "free":
+                del _matrix_blocks[payload]
+            case "load_vector":
+                key, partition = payload
+                mpi_scatter_vector_rows(key, None, partition)
+            case "gather_vector":
+                mpi_gather_vector_rows(*payload)
+            case "free_vector":
+                del _vector_blocks[payload]
+            case "dot":
+                key, N, chunks = payload
+                mpi_dot_rows(key, None, N, chunks)
+            case "matvec":
+                mpi_matvec_rows(*payload)
+            case "axpy":
+                mpi_axpy_rows(*payload)
+            case "vector_dot":
+                mpi_vector_dot_rows(*payload)
+            case "simple_iteration":
+                key, N, epsilon, partition, overlap = payload
+                mpi_simple_iteration_rows(
+                    key, None, N, epsilon, partition, overlap)
+            case "simple_iteration_block":
+                key, N, k, epsilon, partition = payload
+                mpi_simple_iteration_block_rows(
+                    key, None, N, k, epsilon, partition)
+            case "backend":
+                set_local_backend(*payload)
+            case "timings":
+                mpi_gather_timings(payload)
+            case "stop":
+                return
+
+
+def mpi_stop_workers() -> None:
+    if size > 1:
+        comm.bcast(("stop", None), root=0)
+
+
+def main(path: str | None = None):
+    if worker != 0:
+        mpi_worker_loop()
+        return
+
+    if path is not None:
+        # python sle_solver_var1.py matrix.npy: the rows stay on disk
+        # until each rank reads its own block.
+        _matrix_a = mpi_load_matrix(path)
+        _vector_x = np.ones((_matrix_a.shape[0], 1))
+        _vector_b = mpi_matrix_dot(_matrix_a, _vector_x)
+        print(SLESolver.gmres(_matrix_a, _vector_b,
+                              preconditioner="jacobi"))
+        mpi_free_matrix(_matrix_a)
+        mpi_stop_workers()
+        return
+
+    _matrix_a = np.matrix([
+        [9.,  1.,  3., -7.,  9., -0., -9.,  7.],
+        [-8., 10., -3., -0., -4.,  1.,  1., -3.],
+        [-8.,  7.,  7., -0., -0., 10., -1., -0.],
+        [7., -5.,  5.,  9.,  1.,  1., -8., -4.],
+        [3., -3.,  8., -4.,  9.,  4.,  4.,  9.],
+        [9.,  6., -9.,  7.,  3., 10., -3., -6.],
+        [4., -8.,  8.,  2., -2., -2.,  9., 10.],
+        [-4., 10.,  1., -7., -2.,  8., -8.,  5.],
+    ])
+    _vector_x = np.array([
+        [-3.],
+        [-9.],
+        [-2.],
+        [-6.],
+        [-1.],
+        [4.],
+        [-4.],
+        [5.],
+    ])
+    _vector_b = mpi_matrix_dot(_matrix_a, _vector_x)
+    _res_vector_x = SLESolver.simple_iteration(
+        _matrix_a,
+        _vector_b,
+    )
+    print(_vector_x)
+    print(_res_vector_x)
+    print(SLESolver.gmres(_matrix_a, _vector_b))
+
+    # Refinement past what float32 reaches alone: an SPD system with
+    # cond(A) = 1e3 must still come out at float64 accuracy.
+    _q, _ = np.linalg.qr(np.random.default_rng(0).standard_normal((100, 100)))
+    _matrix_spd = (_q * np.geomspace(1., 1e3, 100)) @ _q.T
+    _vector_b = _matrix_spd @ np.ones((100, 1))
+    _res_vector_x = SLESolver.mixed_precision(_matrix_spd, _vector_b)
+    assert _res_vector_x is not None
+    assert (np.linalg.norm(_matrix_spd @ _res_vector_x - _vector_b) <
+            1e-10 * np.linalg.norm(_vector_b))
+    print("Mixed precision, SPD with cond 1e3: OK")
+
+    mpi_stop_workers()
+
 
-for i in range(1, size):
-    comm.send((None, None), dest=i)
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
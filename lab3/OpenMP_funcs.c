@@ -1,68 +1,783 @@
 #include <Python.h>
 #include <omp.h>
+#include <stdint.h>
+#include <string.h>
 
-static PyObject* openmp_matrix_dot(PyObject* self, PyObject* args) {
-    PyObject *matrix_obj, *vector_obj;
-    int num_threads;
+// Матрица-вектор считается по 4 строки за раз: каждый загруженный
+// элемент вектора используется четырежды
+#define GEMV_ROW_TILE 4
+
+// Матрица-матрица: полоса из 64 строк результата на задачу, блок
+// 256 x 256 правой матрицы (512 КиБ float64) остаётся в L2
+#define GEMM_ROW_TILE 64
+#define GEMM_DEPTH_TILE 256
+#define GEMM_COL_TILE 256
+
+#define MIN(a, b) ((a) < (b) ? (a) : (b))
+
+// Входные данные в виде сырого C-массива: либо буфер объекта Python,
+// либо копия вложенных списков, сделанная до параллельной части
+typedef struct {
+    double* data;
+    Py_ssize_t rows;
+    Py_ssize_t cols;
+    Py_buffer view;
+    int has_view;
+} double_array;
+
+static void release_double_array(double_array* array) {
+    if (array->has_view) {
+        PyBuffer_Release(&array->view);
+    } else {
+        PyMem_Free(array->data);
+    }
+    array->data = NULL;
+    array->has_view = 0;
+}
+
+// Проверка, что формат буфера - один из codes в родном порядке байт
+static int has_format(const char* format, const char* codes) {
+    if (format == NULL) {
+        return 0;
+    }
+    if (format[0] == '@' || format[0] == '=' || format[0] == '<') {
+        ++format;
+    }
+    return format[0] != '\0' && format[1] == '\0' && strchr(codes, format[0]) != NULL;
+}
+
+// Получение C-непрерывного буфера float64 из любого объекта с buffer protocol
+static int get_double_buffer(PyObject* obj, double_array* array, int flags, const char* name) {
+    if (PyObject_GetBuffer(obj, &array->view, flags | PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0) {
+        return -1;
+    }
+    if (array->view.itemsize != sizeof(double) || !has_format(array->view.format, "d")) {
+        PyErr_Format(PyExc_TypeError, "%s: %s", name, "ожидается C-непрерывный буфер float64");
+        PyBuffer_Release(&array->view);
+        return -1;
+    }
+
+    array->has_view = 1;
+    array->data = (double*)array->view.buf;
+    array->rows = array->view.ndim > 0 ? array->view.shape[0] : 1;
+    array->cols = array->rows > 0 ? array->view.len / (Py_ssize_t)sizeof(double) / array->rows : 0;
+    return 0;
+}
+
+// Копирование последовательности чисел (или строк матрицы) в C-массив;
+// элементы могут быть любыми объектами с __float__
+static int copy_sequence(PyObject* obj, double_array* array, int is_matrix, const char* name) {
+    PyObject* outer = PySequence_Fast(obj, "");
+    if (outer == NULL) {
+        PyErr_Format(PyExc_TypeError, "%s: %s", name, "ожидается буфер float64 или список");
+        return -1;
+    }
+
+    Py_ssize_t rows = PySequence_Fast_GET_SIZE(outer);
+    Py_ssize_t cols = is_matrix ? 0 : 1;
+    if (is_matrix && rows > 0) {
+        cols = PyObject_Length(PySequence_Fast_GET_ITEM(outer, 0));
+        if (cols < 0) {
+            Py_DECREF(outer);
+            return -1;
+        }
+    }
+
+    array->has_view = 0;
+    array->rows = rows;
+    array->cols = cols;
+    array->data = (double*)PyMem_Malloc((rows * cols > 0 ? rows * cols : 1) * sizeof(double));
+    if (array->data == NULL) {
+        Py_DECREF(outer);
+        PyErr_NoMemory();
+        return -1;
+    }
+
+    for (Py_ssize_t i = 0; i < rows; ++i) {
+        PyObject* item = PySequence_Fast_GET_ITEM(outer, i);
+        if (!is_matrix) {
+            array->data[i] = PyFloat_AsDouble(item);
+            if (array->data[i] == -1.0 && PyErr_Occurred()) {
+                goto fail;
+            }
+            continue;
+        }
+
+        PyObject* row = PySequence_Fast(item, "Строки матрицы должны быть списками");
+        if (row == NULL) {
+            goto fail;
+        }
+        if (PySequence_Fast_GET_SIZE(row) != cols) {
+            PyErr_SetString(PyExc_ValueError, "Строки матрицы должны быть одной длины");
+            Py_DECREF(row);
+            goto fail;
+        }
+        for (Py_ssize_t j = 0; j < cols; ++j) {
+            array->data[i * cols + j] = PyFloat_AsDouble(PySequence_Fast_GET_ITEM(row, j));
+            if (array->data[i * cols + j] == -1.0 && PyErr_Occurred()) {
+                Py_DECREF(row);
+                goto fail;
+            }
+        }
+        Py_DECREF(row);
+    }
+
+    Py_DECREF(outer);
+    return 0;
+
+fail:
+    Py_DECREF(outer);
+    release_double_array(array);
+    return -1;
+}
+
+static int get_double_array(PyObject* obj, double_array* array, int is_matrix, const char* name) {
+    if (PyObject_CheckBuffer(obj)) {
+        return get_double_buffer(obj, array, PyBUF_ND, name);
+    }
+    return copy_sequence(obj, array, is_matrix, name);
+}
+
+// Тип элементов буферов, читаемых без преобразования
+typedef enum { KIND_FLOAT64, KIND_FLOAT32, KIND_INT64 } element_kind;
+
+// Получение C-непрерывного буфера float64, float32 или int64
+static int get_typed_buffer(PyObject* obj, Py_buffer* view, int flags,
+                            element_kind* kind, const char* name) {
+    if (PyObject_GetBuffer(obj, view, flags | PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0) {
+        return -1;
+    }
+    if (view->itemsize == sizeof(double) && has_format(view->format, "d")) {
+        *kind = KIND_FLOAT64;
+    } else if (view->itemsize == sizeof(float) && has_format(view->format, "f")) {
+        *kind = KIND_FLOAT32;
+    } else if (view->itemsize == sizeof(int64_t) && has_format(view->format, "ql")) {
+        *kind = KIND_INT64;
+    } else {
+        PyErr_Format(PyExc_TypeError, "%s: %s", name, "ожидается буфер float64, float32 или int64");
+        PyBuffer_Release(view);
+        return -1;
+    }
+    return 0;
+}
+
+static int get_matrix_buffer(PyObject* obj, Py_buffer* view, int flags,
+                             element_kind* kind, const char* name) {
+    if (get_typed_buffer(obj, view, flags, kind, name) < 0) {
+        return -1;
+    }
+    if (view->ndim != 2) {
+        PyErr_Format(PyExc_ValueError, "%s: %s", name, "ожидается двумерная матрица");
+        PyBuffer_Release(view);
+        return -1;
+    }
+    return 0;
+}
+
+// Получение одномерного буфера int64 (indptr и indices матрицы CSR)
+static int get_index_buffer(PyObject* obj, Py_buffer* view, const char* name) {
+    element_kind kind;
+    if (get_typed_buffer(obj, view, PyBUF_ND, &kind, name) < 0) {
+        return -1;
+    }
+    if (kind != KIND_INT64 || view->ndim != 1) {
+        PyErr_Format(PyExc_TypeError, "%s: %s", name, "ожидается одномерный буфер int64");
+        PyBuffer_Release(view);
+        return -1;
+    }
+    return 0;
+}
+
+// Способ привязки потоков OpenMP к ядрам (proc_bind)
+typedef enum { BIND_DEFAULT, BIND_CLOSE, BIND_SPREAD, BIND_MASTER } bind_kind;
+
+// Настройка schedule(runtime) вызывающего потока и разбор proc_bind;
+// значения ICV у каждого потока Python свои, вызовы друг другу не мешают
+static int configure_parallel(const char* schedule, int chunk, const char* proc_bind, bind_kind* bind) {
+    omp_sched_t kind;
+    if (strcmp(schedule, "static") == 0) {
+        kind = omp_sched_static;
+    } else if (strcmp(schedule, "dynamic") == 0) {
+        kind = omp_sched_dynamic;
+    } else if (strcmp(schedule, "guided") == 0) {
+        kind = omp_sched_guided;
+    } else {
+        PyErr_Format(PyExc_ValueError, "Unknown schedule: %s", schedule);
+        return -1;
+    }
+    if (chunk < 0) {
+        PyErr_SetString(PyExc_ValueError, "Размер порции не может быть отрицательным");
+        return -1;
+    }
+
+    if (proc_bind == NULL || strcmp(proc_bind, "default") == 0) {
+        *bind = BIND_DEFAULT;
+    } else if (strcmp(proc_bind, "close") == 0) {
+        *bind = BIND_CLOSE;
+    } else if (strcmp(proc_bind, "spread") == 0) {
+        *bind = BIND_SPREAD;
+    } else if (strcmp(proc_bind, "master") == 0) {
+        *bind = BIND_MASTER;
+    } else {
+        PyErr_Format(PyExc_ValueError, "Unknown proc_bind: %s", proc_bind);
+        return -1;
+    }
+
+    // Нулевой размер порции означает размер по умолчанию для выбранного вида
+    omp_set_schedule(kind, chunk);
+    return 0;
+}
+
+// Аргументы вычислительного ядра: result[rows x cols] = left[rows x depth] * right[depth x cols]
+typedef struct {
+    const void* left;
+    const void* right;
+    void* result;
+    Py_ssize_t rows;
+    Py_ssize_t depth;
+    Py_ssize_t cols;
+} kernel_args;
+
+// Аргументы ядра CSR: result[rows] = A * vector, A задана indptr/indices/data
+typedef struct {
+    const int64_t* indptr;
+    const int64_t* indices;
+    const double* data;
+    const double* vector;
+    double* result;
+    Py_ssize_t rows;
+    Py_ssize_t cols;
+    int invalid;
+} csr_kernel_args;
+
+typedef void (*kernel_func)(void* args);
+
+// Ядра вызываются внутри параллельной области и делят работу через
+// "omp for schedule(runtime)"; proc_bind задаётся только в самой области,
+// поэтому на каждый вариант привязки своя ветка
+static void run_parallel(kernel_func kernel, void* args, int num_threads, bind_kind bind) {
+    switch (bind) {
+    case BIND_CLOSE:
+        #pragma omp parallel num_threads(num_threads) proc_bind(close)
+        kernel(args);
+        break;
+    case BIND_SPREAD:
+        #pragma omp parallel num_threads(num_threads) proc_bind(spread)
+        kernel(args);
+        break;
+    case BIND_MASTER:
+        #pragma omp parallel num_threads(num_threads) proc_bind(master)
+        kernel(args);
+        break;
+    default:
+        #pragma omp parallel num_threads(num_threads)
+        kernel(args);
+        break;
+    }
+}
+
+// Скалярное произведение и умножение по 4 строки; omp simd без aligned,
+// так как начало строки выровнено только при подходящей ширине матрицы.
+// Каждая полоса строк результата пишется ровно одним потоком
+#define DEFINE_GEMV_KERNEL(name, dot_name, type)                                        \
+static type dot_name(const type* row, const type* vector, Py_ssize_t size) {            \
+    type sum = 0;                                                                       \
+    _Pragma("omp simd reduction(+:sum)")                                                \
+    for (Py_ssize_t j = 0; j < size; ++j) {                                             \
+        sum += row[j] * vector[j];                                                      \
+    }                                                                                   \
+    return sum;                                                                         \
+}                                                                                       \
+                                                                                        \
+static void name(void* data) {                                                          \
+    const kernel_args* args = (const kernel_args*)data;                                 \
+    const type* matrix = (const type*)args->left;                                       \
+    const type* vector = (const type*)args->right;                                      \
+    type* result = (type*)args->result;                                                 \
+    Py_ssize_t rows = args->rows, size = args->depth;                                   \
+    Py_ssize_t tiles = (rows + GEMV_ROW_TILE - 1) / GEMV_ROW_TILE;                      \
+                                                                                        \
+    _Pragma("omp for schedule(runtime)")                                                \
+    for (Py_ssize_t tile = 0; tile < tiles; ++tile) {                                   \
+        Py_ssize_t begin = tile * GEMV_ROW_TILE;                                        \
+        if (begin + GEMV_ROW_TILE > rows) {                                             \
+            for (Py_ssize_t i = begin; i < rows; ++i) {                                 \
+                result[i] = dot_name(matrix + i * size, vector, size);                  \
+            }                                                                           \
+            continue;                                                                   \
+        }                                                                               \
+                                                                                        \
+        const type* row0 = matrix + begin * size;                                       \
+        const type* row1 = row0 + size;                                                 \
+        const type* row2 = row1 + size;                                                 \
+        const type* row3 = row2 + size;                                                 \
+        type sum0 = 0, sum1 = 0, sum2 = 0, sum3 = 0;                                    \
+                                                                                        \
+        _Pragma("omp simd reduction(+:sum0, sum1, sum2, sum3)")                         \
+        for (Py_ssize_t j = 0; j < size; ++j) {                                         \
+            type x = vector[j];                                                         \
+            sum0 += row0[j] * x;                                                        \
+            sum1 += row1[j] * x;                                                        \
+            sum2 += row2[j] * x;                                                        \
+            sum3 += row3[j] * x;                                                        \
+        }                                                                               \
+                                                                                        \
+        result[begin] = sum0;                                                           \
+        result[begin + 1] = sum1;                                                       \
+        result[begin + 2] = sum2;                                                       \
+        result[begin + 3] = sum3;                                                       \
+    }                                                                                   \
+}
+
+DEFINE_GEMV_KERNEL(gemv_float64_kernel, dot_row_float64, double)
+DEFINE_GEMV_KERNEL(gemv_float32_kernel, dot_row_float32, float)
+
+// Блочное умножение матриц в порядке i-k-j: внутренний цикл идёт по
+// строке результата и строке правой матрицы подряд и векторизуется
+#define DEFINE_GEMM_KERNEL(name, type)                                                  \
+static void name(void* data) {                                                          \
+    const kernel_args* args = (const kernel_args*)data;                                 \
+    const type* left = (const type*)args->left;                                         \
+    const type* right = (const type*)args->right;                                       \
+    type* result = (type*)args->result;                                                 \
+    Py_ssize_t rows = args->rows, depth = args->depth, cols = args->cols;               \
+    Py_ssize_t tiles = (rows + GEMM_ROW_TILE - 1) / GEMM_ROW_TILE;                      \
+                                                                                        \
+    _Pragma("omp for schedule(runtime)")                                                \
+    for (Py_ssize_t tile = 0; tile < tiles; ++tile) {                                   \
+        Py_ssize_t row_begin = tile * GEMM_ROW_TILE;                                    \
+        Py_ssize_t row_end = MIN(row_begin + GEMM_ROW_TILE, rows);                      \
+        memset(result + row_begin * cols, 0, (row_end - row_begin) * cols * sizeof(type)); \
+                                                                                        \
+        for (Py_ssize_t kk = 0; kk < depth; kk += GEMM_DEPTH_TILE) {                    \
+            Py_ssize_t k_end = MIN(kk + GEMM_DEPTH_TILE, depth);                        \
+            for (Py_ssize_t jj = 0; jj < cols; jj += GEMM_COL_TILE) {                   \
+                Py_ssize_t j_end = MIN(jj + GEMM_COL_TILE, cols);                       \
+                for (Py_ssize_t i = row_begin; i < row_end; ++i) {                      \
+                    type* result_row = result + i * cols;                               \
+                    for (Py_ssize_t k = kk; k < k_end; ++k) {                           \
+                        const type a = left[i * depth + k];                             \
+                        const type* right_row = right + k * cols;                       \
+                        _Pragma("omp simd")                                             \
+                        for (Py_ssize_t j = jj; j < j_end; ++j) {                       \
+                            result_row[j] += a * right_row[j];                          \
+                        }                                                               \
+                    }                                                                   \
+                }                                                                       \
+            }                                                                           \
+        }                                                                               \
+    }                                                                                   \
+}
+
+DEFINE_GEMM_KERNEL(gemm_float64_kernel, double)
+DEFINE_GEMM_KERNEL(gemm_float32_kernel, float)
+DEFINE_GEMM_KERNEL(gemm_int64_kernel, int64_t)
+
+// Строки CSR различаются по длине, поэтому для них полезен schedule
+// dynamic или guided; номер столбца вне матрицы не читается, а отмечается
+static void csr_kernel(void* data) {
+    csr_kernel_args* args = (csr_kernel_args*)data;
+    const int64_t* indptr = args->indptr;
+    const int64_t* indices = args->indices;
+    const double* values = args->data;
+    const double* vector = args->vector;
+    double* result = args->result;
+    Py_ssize_t cols = args->cols;
+
+    #pragma omp for schedule(runtime)
+    for (Py_ssize_t i = 0; i < args->rows; ++i) {
+        double sum = 0.0;
+        for (int64_t k = indptr[i]; k < indptr[i + 1]; ++k) {
+            if ((uint64_t)indices[k] >= (uint64_t)cols) {
+                #pragma omp atomic write
+                args->invalid = 1;
+                break;
+            }
+            sum += values[k] * vector[indices[k]];
+        }
+        result[i] = sum;
+    }
+}
+
+// Список результатов: плоский для одного вектора, список строк для нескольких
+static PyObject* build_result_list(const double* data, Py_ssize_t rows, Py_ssize_t rhs) {
+    PyObject* result_obj = PyList_New(rows);
+    for (Py_ssize_t i = 0; result_obj != NULL && i < rows; ++i) {
+        PyObject* result_element;
+        if (rhs == 1) {
+            result_element = PyFloat_FromDouble(data[i]);
+        } else {
+            result_element = PyList_New(rhs);
+            for (Py_ssize_t j = 0; result_element != NULL && j < rhs; ++j) {
+                PyObject* value = PyFloat_FromDouble(data[i * rhs + j]);
+                if (value == NULL) {
+                    Py_CLEAR(result_element);
+                    break;
+                }
+                PyList_SET_ITEM(result_element, j, value);
+            }
+        }
+        if (result_element == NULL) {
+            Py_CLEAR(result_obj);
+            break;
+        }
+        PyList_SET_ITEM(result_obj, i, result_element);
+    }
+    return result_obj;
+}
+
+// Буфер float32 (любой раскладки) уходит в отдельную ветку openmp_matrix_dot
+static int is_float32_buffer(PyObject* obj) {
+    Py_buffer view;
+    if (!PyObject_CheckBuffer(obj)) {
+        return 0;
+    }
+    if (PyObject_GetBuffer(obj, &view, PyBUF_STRIDES | PyBUF_FORMAT) < 0) {
+        PyErr_Clear();
+        return 0;
+    }
+    int result = view.itemsize == sizeof(float) && has_format(view.format, "f");
+    PyBuffer_Release(&view);
+    return result;
+}
+
+// openmp_matrix_dot для матрицы float32: вдвое меньше байт на элемент и
+// вдвое больше элементов в SIMD-регистре. Вектор и out - тоже float32
+static PyObject* float32_matrix_dot(PyObject* matrix_obj, PyObject* vector_obj, PyObject* out_obj,
+                                    int num_threads, bind_kind bind) {
+    if (out_obj == Py_None) {
+        PyErr_SetString(PyExc_TypeError, "Для матрицы float32 нужен буфер out");
+        return NULL;
+    }
+
+    Py_buffer matrix, vector, out;
+    element_kind matrix_kind, vector_kind, out_kind;
+    if (get_matrix_buffer(matrix_obj, &matrix, PyBUF_ND, &matrix_kind, "matrix") < 0) {
+        return NULL;
+    }
+    if (get_typed_buffer(vector_obj, &vector, PyBUF_ND, &vector_kind, "vector") < 0) {
+        PyBuffer_Release(&matrix);
+        return NULL;
+    }
+    if (get_typed_buffer(out_obj, &out, PyBUF_ND | PyBUF_WRITABLE, &out_kind, "out") < 0) {
+        PyBuffer_Release(&vector);
+        PyBuffer_Release(&matrix);
+        return NULL;
+    }
+
+    Py_ssize_t rows = matrix.shape[0], cols = matrix.shape[1];
+    Py_ssize_t rhs = vector.ndim == 2 && vector.shape[0] == cols ? vector.shape[1] : 1;
+
+    PyObject* result_obj = NULL;
+    if (vector_kind != KIND_FLOAT32 || out_kind != KIND_FLOAT32) {
+        PyErr_SetString(PyExc_TypeError, "Вектор и out должны быть float32, как и матрица");
+    } else if (vector.len / (Py_ssize_t)sizeof(float) != cols * rhs) {
+        PyErr_SetString(PyExc_ValueError, "Размеры матрицы и вектора не совпадают");
+    } else if (out.len / (Py_ssize_t)sizeof(float) != rows * rhs) {
+        PyErr_SetString(PyExc_ValueError, "Размер out не совпадает с размером результата");
+    } else {
+        kernel_args kernel = {matrix.buf, vector.buf, out.buf, rows, cols, rhs};
+
+        Py_BEGIN_ALLOW_THREADS
+        run_parallel(rhs == 1 ? gemv_float32_kernel : gemm_float32_kernel, &kernel, num_threads, bind);
+        Py_END_ALLOW_THREADS
+
+        Py_INCREF(out_obj);
+        result_obj = out_obj;
+    }
+
+    PyBuffer_Release(&out);
+    PyBuffer_Release(&vector);
+    PyBuffer_Release(&matrix);
+    return result_obj;
+}
+
+static PyObject* openmp_matrix_dot(PyObject* self, PyObject* args, PyObject* kwargs) {
+    static char* keywords[] = {"matrix", "vector", "num_threads", "out",
+                               "schedule", "chunk", "proc_bind", NULL};
+    PyObject *matrix_obj, *vector_obj, *out_obj = Py_None;
+    int num_threads, chunk = 0;
+    const char *schedule = "static", *proc_bind = NULL;
+    bind_kind bind;
 
     // Получение аргументов из Python
-    if (!PyArg_ParseTuple(args, "OOi", &matrix_obj, &vector_obj, &num_threads)) {
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OOi|O$siz", keywords,
+                                     &matrix_obj, &vector_obj, &num_threads, &out_obj,
+                                     &schedule, &chunk, &proc_bind)) {
         return NULL;
     }
+    if (num_threads < 1) {
+        PyErr_SetString(PyExc_ValueError, "Число потоков должно быть положительным");
+        return NULL;
+    }
+    if (configure_parallel(schedule, chunk, proc_bind, &bind) < 0) {
+        return NULL;
+    }
+    if (is_float32_buffer(matrix_obj)) {
+        return float32_matrix_dot(matrix_obj, vector_obj, out_obj, num_threads, bind);
+    }
 
-    // Проверка типов аргументов
-    if (!PyList_Check(matrix_obj) || !PyList_Check(vector_obj)) {
-        PyErr_SetString(PyExc_TypeError, "Аргументы должны быть списками");
+    // Все входные данные превращаются в сырые C-массивы до параллельной части
+    double_array matrix = {0}, vector = {0}, result = {0};
+    if (get_double_array(matrix_obj, &matrix, 1, "matrix") < 0) {
+        return NULL;
+    }
+    if (get_double_array(vector_obj, &vector, 0, "vector") < 0) {
+        release_double_array(&matrix);
         return NULL;
     }
 
     // Получение размеров матрицы и вектора
-    Py_ssize_t matrix_rows = PyList_Size(matrix_obj);
-    Py_ssize_t matrix_cols = PyList_Size(PyList_GetItem(matrix_obj, 0));
-    Py_ssize_t vector_size = PyList_Size(vector_obj);
+    if (matrix.has_view && matrix.view.ndim != 2) {
+        PyErr_SetString(PyExc_ValueError, "Матрица должна быть двумерной");
+        goto fail;
+    }
+    Py_ssize_t matrix_rows = matrix.rows;
+    Py_ssize_t matrix_cols = matrix.cols;
 
-    // Проверка размеров матрицы и вектора
-    if (matrix_cols != vector_size) {
+    // Двумерный буфер из matrix_cols строк - это набор из нескольких правых
+    // частей по столбцам; остальное читается как один вектор
+    Py_ssize_t rhs = 1;
+    if (vector.has_view && vector.view.ndim == 2 && vector.rows == matrix_cols) {
+        rhs = vector.cols;
+    } else if (vector.rows * vector.cols != matrix_cols) {
+        // Проверка размеров матрицы и вектора
         PyErr_SetString(PyExc_ValueError, "Размеры матрицы и вектора не совпадают");
-        return NULL;
+        goto fail;
     }
 
-    // Создание результирующего вектора
-    PyObject* result_vector = PyList_New(matrix_rows);
+    // Результат пишется в буфер вызывающего либо во временный массив
+    if (out_obj != Py_None) {
+        if (get_double_buffer(out_obj, &result, PyBUF_ND | PyBUF_WRITABLE, "out") < 0) {
+            goto fail;
+        }
+        if (result.rows * result.cols != matrix_rows * rhs) {
+            PyErr_SetString(PyExc_ValueError, "Размер out не совпадает с размером результата");
+            goto fail;
+        }
+    } else {
+        result.data = (double*)PyMem_Malloc((matrix_rows * rhs > 0 ? matrix_rows * rhs : 1) * sizeof(double));
+        if (result.data == NULL) {
+            PyErr_NoMemory();
+            goto fail;
+        }
+    }
 
-    #pragma omp parallel num_threads(num_threads)
-    {
-        #pragma omp for schedule(static) reduction(+:sum)
-        for (Py_ssize_t i = 0; i < matrix_rows; ++i) {
-            double sum = 0.0;
+    kernel_args kernel = {matrix.data, vector.data, result.data, matrix_rows, matrix_cols, rhs};
 
-            // Вычисление скалярного произведения строки матрицы и вектора
-            for (Py_ssize_t j = 0; j < matrix_cols; ++j) {
-                PyObject* row = PyList_GetItem(matrix_obj, i);
-                PyObject* element = PyList_GetItem(row, j);
-                double value = PyFloat_AsDouble(element);
+    // Параллельная часть не трогает объекты Python, поэтому GIL отпускается
+    Py_BEGIN_ALLOW_THREADS
+    run_parallel(rhs == 1 ? gemv_float64_kernel : gemm_float64_kernel, &kernel, num_threads, bind);
+    Py_END_ALLOW_THREADS
 
-                PyObject* vector_element = PyList_GetItem(vector_obj, j);
-                double vector_value = PyFloat_AsDouble(vector_element);
+    PyObject* result_obj;
+    if (out_obj != Py_None) {
+        Py_INCREF(out_obj);
+        result_obj = out_obj;
+    } else {
+        // Создание результирующего списка после параллельной части
+        result_obj = build_result_list(result.data, matrix_rows, rhs);
+    }
 
-                sum += value * vector_value;
-            }
+    release_double_array(&result);
+    release_double_array(&vector);
+    release_double_array(&matrix);
+    return result_obj;
 
-            // Запись результата в результирующий вектор
-            #pragma omp critical
-            {
-                PyObject* result_element = PyFloat_FromDouble(sum);
-                PyList_SetItem(result_vector, i, result_element);
-            }
+fail:
+    release_double_array(&result);
+    release_double_array(&vector);
+    release_double_array(&matrix);
+    return NULL;
+}
+
+static PyObject* openmp_csr_matrix_dot(PyObject* self, PyObject* args, PyObject* kwargs) {
+    static char* keywords[] = {"indptr", "indices", "data", "vector", "num_threads", "out",
+                               "schedule", "chunk", "proc_bind", NULL};
+    PyObject *indptr_obj, *indices_obj, *data_obj, *vector_obj, *out_obj = Py_None;
+    int num_threads, chunk = 0;
+    const char *schedule = "static", *proc_bind = NULL;
+    bind_kind bind;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OOOOi|O$siz", keywords,
+                                     &indptr_obj, &indices_obj, &data_obj, &vector_obj,
+                                     &num_threads, &out_obj, &schedule, &chunk, &proc_bind)) {
+        return NULL;
+    }
+    if (num_threads < 1) {
+        PyErr_SetString(PyExc_ValueError, "Число потоков должно быть положительным");
+        return NULL;
+    }
+    if (configure_parallel(schedule, chunk, proc_bind, &bind) < 0) {
+        return NULL;
+    }
+
+    Py_buffer indptr = {0}, indices = {0};
+    double_array values = {0}, vector = {0}, result = {0};
+    if (get_index_buffer(indptr_obj, &indptr, "indptr") < 0) {
+        return NULL;
+    }
+    if (get_index_buffer(indices_obj, &indices, "indices") < 0) {
+        PyBuffer_Release(&indptr);
+        return NULL;
+    }
+    if (get_double_buffer(data_obj, &values, PyBUF_ND, "data") < 0) {
+        goto fail;
+    }
+    if (get_double_array(vector_obj, &vector, 0, "vector") < 0) {
+        goto fail;
+    }
+
+    // Проверка indptr: он не убывает и описывает ровно nnz элементов,
+    // так что ядро не выходит за границы indices и data
+    const int64_t* row_starts = (const int64_t*)indptr.buf;
+    Py_ssize_t rows = indptr.shape[0] - 1;
+    Py_ssize_t nnz = indices.shape[0];
+    int valid = rows >= 0 && values.rows * values.cols == nnz &&
+                row_starts[0] == 0 && row_starts[rows] == nnz;
+    for (Py_ssize_t i = 0; valid && i < rows; ++i) {
+        valid = row_starts[i] <= row_starts[i + 1];
+    }
+    if (!valid) {
+        PyErr_SetString(PyExc_ValueError, "Некорректная матрица CSR");
+        goto fail;
+    }
+
+    if (out_obj != Py_None) {
+        if (get_double_buffer(out_obj, &result, PyBUF_ND | PyBUF_WRITABLE, "out") < 0) {
+            goto fail;
+        }
+        if (result.rows * result.cols != rows) {
+            PyErr_SetString(PyExc_ValueError, "Размер out не совпадает с размером результата");
+            goto fail;
+        }
+    } else {
+        result.data = (double*)PyMem_Malloc((rows > 0 ? rows : 1) * sizeof(double));
+        if (result.data == NULL) {
+            PyErr_NoMemory();
+            goto fail;
         }
     }
 
-    return result_vector;
+    csr_kernel_args kernel = {row_starts, (const int64_t*)indices.buf, values.data, vector.data,
+                              result.data, rows, vector.rows * vector.cols, 0};
+
+    Py_BEGIN_ALLOW_THREADS
+    run_parallel(csr_kernel, &kernel, num_threads, bind);
+    Py_END_ALLOW_THREADS
+
+    if (kernel.invalid) {
+        PyErr_SetString(PyExc_ValueError, "Номер столбца CSR выходит за размер вектора");
+        goto fail;
+    }
+
+    PyObject* result_obj;
+    if (out_obj != Py_None) {
+        Py_INCREF(out_obj);
+        result_obj = out_obj;
+    } else {
+        result_obj = build_result_list(result.data, rows, 1);
+    }
+
+    release_double_array(&result);
+    release_double_array(&vector);
+    release_double_array(&values);
+    PyBuffer_Release(&indices);
+    PyBuffer_Release(&indptr);
+    return result_obj;
+
+fail:
+    release_double_array(&result);
+    release_double_array(&vector);
+    release_double_array(&values);
+    PyBuffer_Release(&indices);
+    PyBuffer_Release(&indptr);
+    return NULL;
+}
+
+static PyObject* openmp_matrix_matmul(PyObject* self, PyObject* args, PyObject* kwargs) {
+    static char* keywords[] = {"left", "right", "num_threads", "out",
+                               "schedule", "chunk", "proc_bind", NULL};
+    PyObject *left_obj, *right_obj, *out_obj;
+    int num_threads, chunk = 0;
+    const char *schedule = "static", *proc_bind = NULL;
+    bind_kind bind;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OOiO|$siz", keywords,
+                                     &left_obj, &right_obj, &num_threads, &out_obj,
+                                     &schedule, &chunk, &proc_bind)) {
+        return NULL;
+    }
+    if (num_threads < 1) {
+        PyErr_SetString(PyExc_ValueError, "Число потоков должно быть положительным");
+        return NULL;
+    }
+    if (configure_parallel(schedule, chunk, proc_bind, &bind) < 0) {
+        return NULL;
+    }
+
+    Py_buffer left, right, out;
+    element_kind left_kind, right_kind, out_kind;
+    if (get_matrix_buffer(left_obj, &left, PyBUF_ND, &left_kind, "left") < 0) {
+        return NULL;
+    }
+    if (get_matrix_buffer(right_obj, &right, PyBUF_ND, &right_kind, "right") < 0) {
+        PyBuffer_Release(&left);
+        return NULL;
+    }
+    if (get_matrix_buffer(out_obj, &out, PyBUF_ND | PyBUF_WRITABLE, &out_kind, "out") < 0) {
+        PyBuffer_Release(&right);
+        PyBuffer_Release(&left);
+        return NULL;
+    }
+
+    PyObject* result_obj = NULL;
+    if (left_kind != right_kind || left_kind != out_kind) {
+        PyErr_SetString(PyExc_TypeError, "Типы элементов матриц не совпадают");
+    } else if (left.shape[1] != right.shape[0] ||
+               out.shape[0] != left.shape[0] || out.shape[1] != right.shape[1]) {
+        PyErr_SetString(PyExc_ValueError, "Размеры матриц не совпадают");
+    } else {
+        kernel_args kernel = {left.buf, right.buf, out.buf,
+                              left.shape[0], left.shape[1], right.shape[1]};
+
+        kernel_func gemm_kernel = left_kind == KIND_INT64 ? gemm_int64_kernel :
+                                  left_kind == KIND_FLOAT32 ? gemm_float32_kernel :
+                                  gemm_float64_kernel;
+
+        Py_BEGIN_ALLOW_THREADS
+        run_parallel(gemm_kernel, &kernel, num_threads, bind);
+        Py_END_ALLOW_THREADS
+
+        Py_INCREF(out_obj);
+        result_obj = out_obj;
+    }
+
+    PyBuffer_Release(&out);
+    PyBuffer_Release(&right);
+    PyBuffer_Release(&left);
+    return result_obj;
 }
 
 
 static PyMethodDef methods[] = {
-    {"openmp_matrix_dot", openmp_matrix_dot, METH_VARARGS, "Умножает матрицу на вектор"},
+    {"openmp_matrix_dot", (PyCFunction)(void(*)(void))openmp_matrix_dot,
+     METH_VARARGS | METH_KEYWORDS,
+     "Умножает матрицу на вектор или на несколько векторов-столбцов (N x k). "
+     "Принимает C-непрерывные буферы float64 или списки; результат пишется "
+     "в out, если он передан, иначе возвращается список. Для матрицы float32 "
+     "вектор и обязательный out тоже float32. Вычисление идёт "
+     "без GIL; schedule ('static', 'dynamic', 'guided'), chunk и proc_bind "
+     "('default', 'close', 'spread', 'master') задают распределение работы"},
+    {"openmp_csr_matrix_dot", (PyCFunction)(void(*)(void))openmp_csr_matrix_dot,
+     METH_VARARGS | METH_KEYWORDS,
+     "Умножает матрицу CSR (indptr и indices - int64, data - float64) на "
+     "вектор; out, schedule, chunk и proc_bind - как у openmp_matrix_dot"},
+    {"openmp_matrix_matmul", (PyCFunction)(void(*)(void))openmp_matrix_matmul,
+     METH_VARARGS | METH_KEYWORDS,
+     "Блочно умножает матрицы left и right (C-непрерывные float64, float32 или int64) "
+     "и пишет результат в out; schedule, chunk и proc_bind - как у "
+     "openmp_matrix_dot"},
     {NULL, NULL, 0, NULL}
 };
 
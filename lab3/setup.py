@@ -3,8 +3,8 @@ from setuptools import setup, Extension
 module = Extension(
     'OpenMP_funcs',
     sources=['OpenMP_funcs.c'],
-    extra_compile_args=['-fopenmp', '-lopenmp'],
-    extra_link_args=['-fopenmp', '-lopenmp'],
+    extra_compile_args=['-fopenmp'],
+    extra_link_args=['-fopenmp'],
 )
 
 setup(
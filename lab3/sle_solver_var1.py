@@ -1,29 +1,64 @@
+import importlib.util
 import numpy as np
+import os
+import sys
 import time
 
 import OpenMP_funcs
 
+
+def load_shared_module(name: str, path: str):
+    # Loaded from its file like benchmark.py loads the labs, so sys.path
+    # stays as it is; registered under its plain name, so lab2 and lab3
+    # share one module (and one CSRMatrix class) in a process.
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+# CSRMatrix is shared with lab2 and lives there.
+CSRMatrix = load_shared_module("csr_matrix", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, "lab2",
+    "csr_matrix.py")).CSRMatrix
+
+num_threads = 2
+# OpenMP loop schedule ("static", "dynamic", "guided") and thread affinity
+# ("default", "close", "spread", "master") used by openmp_matrix_dot.
+schedule = "static"
+proc_bind = "default"
+
+
 class SLESolver:
 
     @classmethod
     def __next_iter(
         cls,
-        matrix_a: np.matrix[float, float],
+        matrix_a: np.ndarray[float, float],
         vector_x: np.ndarray[None, float],
         vector_b: np.ndarray[None, float],
-        tau: float
+        tau: float,
+        vector_ax: np.ndarray[None, float],
     ) -> np.ndarray[None, float]:
-        return vector_x - (openmp_matrix_dot(matrix_a, vector_x) - vector_b) * tau
+        openmp_matrix_dot(matrix_a, vector_x, out=vector_ax)
+        vector_ax -= vector_b
+        vector_ax *= tau
+        vector_x -= vector_ax
+        return vector_x
 
     @classmethod
     def __end_measure(
         cls,
-        matrix_a: np.matrix[float, float],
+        matrix_a: np.ndarray[float, float],
         vector_x: np.ndarray[None, float],
         vector_b: np.ndarray[None, float],
+        vector_ax: np.ndarray[None, float],
     ) -> float:
-        return (np.linalg.norm(openmp_matrix_dot(matrix_a, vector_x) - vector_b) /
-                np.linalg.norm(vector_b))
+        openmp_matrix_dot(matrix_a, vector_x, out=vector_ax)
+        vector_ax -= vector_b
+        return np.linalg.norm(vector_ax) / np.linalg.norm(vector_b)
 
     @classmethod
     def simple_iteration(
@@ -37,12 +72,18 @@ class SLESolver:
         assert matrix_a.shape == (N, N)
         assert vector_b.shape == (N, 1)
 
+        # A is converted to a C-contiguous float64 buffer once and every
+        # product lands in the same preallocated vector, so the kernel
+        # reads and writes memory directly on each iteration.
+        matrix_a = contiguous_matrix(matrix_a)
+        vector_ax = np.empty((N, 1))
+
         tau = .01 / N
         last_iter_measure = None
-        vector_x = np.full((N, 1), 0)
+        vector_x = np.zeros((N, 1))
         for _ in iter(int, 1):
             actual_iter_measure = cls.__end_measure(
-                matrix_a, vector_x, vector_b)
+                matrix_a, vector_x, vector_b, vector_ax)
             if actual_iter_measure < epsilon:
                 break
 
@@ -52,56 +93,537 @@ class SLESolver:
                     return None
                 tau *= -1
 
-            vector_x = cls.__next_iter(matrix_a, vector_x, vector_b, tau)
+            vector_x = cls.__next_iter(
+                matrix_a, vector_x, vector_b, tau, vector_ax)
             last_iter_measure = actual_iter_measure
 
         return vector_x
 
+    @classmethod
+    def simple_iteration_block(
+        cls,
+        matrix_a: np.matrix[float, float] | CSRMatrix,
+        vectors_b: np.ndarray[float, float],
+        epsilon: float = 1e-10,
+    ) -> np.ndarray[float, float]:
+
+        # Every column of B is its own system; all of them step together,
+        # so each iteration is one multi-RHS product over the unconverged
+        # columns. Columns that diverge come back as NaN.
+        N, k = vectors_b.shape
+        assert matrix_a.shape == (N, N)
+
+        matrix_a = contiguous_matrix(matrix_a)
+        vectors_b = np.ascontiguousarray(vectors_b, dtype=np.float64)
+        vectors_x = np.zeros((N, k))
+
+        def residual(columns):
+            vectors_r = openmp_matrix_dot(
+                matrix_a, vectors_x[:, columns]) - vectors_b[:, columns]
+            return vectors_r, (vectors_r * vectors_r).sum(axis=0)
+
+        def update(columns, vectors_r, tau):
+            vectors_x[:, columns] -= vectors_r * tau
+
+        failed = block_simple_iteration(
+            residual, update, np.linalg.norm(vectors_b, axis=0),
+            .01 / N, epsilon)
+        vectors_x[:, failed] = np.nan
+        return vectors_x
+
+    @classmethod
+    def mixed_precision(
+        cls,
+        matrix_a: np.matrix[float, float] | CSRMatrix,
+        vector_b: np.ndarray[None, float],
+        epsilon: float = 1e-10,
+        inner_epsilon: float = 1e-3,
+        preconditioner: str | None = None,
+        max_refinements: int = 50,
+    ) -> (np.ndarray[float, float] | None):
+
+        N = vector_b.shape[0]
+        assert matrix_a.shape == (N, N)
+        assert vector_b.shape == (N, 1)
+
+        # Iterative refinement: the corrections come from GMRES on a
+        # float32 copy of A, twice as many values per SIMD register and
+        # per cache line, while the residual b - A x and x stay float64.
+        # CSR values keep float64.
+        if np.linalg.norm(vector_b) == 0:
+            return np.zeros((N, 1))
+
+        matrix_a = contiguous_matrix(matrix_a)
+        matrix_low = matrix_a
+        if not isinstance(matrix_a, CSRMatrix):
+            matrix_low = np.ascontiguousarray(matrix_a, dtype=np.float32)
+
+        vector_b = np.array(vector_b, dtype=np.float64)
+        vector_b_norm = np.linalg.norm(vector_b)
+        vector_x = np.zeros((N, 1))
+        vector_ax = np.empty((N, 1))
+        last_measure = np.inf
+        for _ in range(max_refinements):
+            openmp_matrix_dot(matrix_a, vector_x, out=vector_ax)
+            vector_r = vector_b - vector_ax
+            actual_measure = np.linalg.norm(vector_r) / vector_b_norm
+            if actual_measure < epsilon:
+                return vector_x
+            # The float32 corrections no longer help once the float64
+            # residual stops going down.
+            if actual_measure >= last_measure:
+                return None
+            last_measure = actual_measure
+
+            # A correction that misses inner_epsilon still moves x closer.
+            vector_x += cls.__krylov(
+                cls.__gmres, matrix_low, vector_r, inner_epsilon,
+                preconditioner, None, None, 30, True)
+
+        return None
+
+    @classmethod
+    def conjugate_gradient(
+        cls,
+        matrix_a: np.matrix[float, float],
+        vector_b: np.ndarray[None, float],
+        epsilon: float = 1e-10,
+        preconditioner: str | None = None,
+        max_iter: int | None = None,
+        matvec=None,
+    ) -> (np.ndarray[float, float] | None):
+        return cls.__krylov(cls.__conjugate_gradient, matrix_a, vector_b,
+                            epsilon, preconditioner, max_iter, matvec)
+
+    @classmethod
+    def bicgstab(
+        cls,
+        matrix_a: np.matrix[float, float],
+        vector_b: np.ndarray[None, float],
+        epsilon: float = 1e-10,
+        preconditioner: str | None = None,
+        max_iter: int | None = None,
+        matvec=None,
+    ) -> (np.ndarray[float, float] | None):
+        return cls.__krylov(cls.__bicgstab, matrix_a, vector_b,
+                            epsilon, preconditioner, max_iter, matvec)
+
+    @classmethod
+    def gmres(
+        cls,
+        matrix_a: np.matrix[float, float],
+        vector_b: np.ndarray[None, float],
+        epsilon: float = 1e-10,
+        preconditioner: str | None = None,
+        max_iter: int | None = None,
+        matvec=None,
+        restart: int = 30,
+    ) -> (np.ndarray[float, float] | None):
+        assert restart > 0
+        return cls.__krylov(cls.__gmres, matrix_a, vector_b,
+                            epsilon, preconditioner, max_iter, matvec,
+                            restart)
+
+    @classmethod
+    def __krylov(
+        cls,
+        method,
+        matrix_a: np.matrix[float, float],
+        vector_b: np.ndarray[None, float],
+        epsilon: float,
+        preconditioner: str | None,
+        max_iter: int | None,
+        matvec,
+        *args,
+    ) -> (np.ndarray[float, float] | None):
+
+        N = vector_b.shape[0]
+        assert matrix_a.shape == (N, N)
+        assert vector_b.shape == (N, 1)
+
+        if matvec is None:
+            matvec = openmp_matrix_dot
+        if max_iter is None:
+            max_iter = 10 * N
+
+        matrix_a = contiguous_matrix(matrix_a)
+
+        def dot(vector_x):
+            return np.asarray(matvec(matrix_a, vector_x),
+                              dtype=np.float64).reshape(N, 1)
+
+        return method(dot, cls.__preconditioner(matrix_a, preconditioner),
+                      np.array(vector_b, dtype=np.float64), epsilon,
+                      max_iter, *args)
+
+    @classmethod
+    def __preconditioner(
+        cls,
+        matrix_a: np.matrix[float, float],
+        preconditioner: str | None,
+    ):
+        match preconditioner:
+            case None:
+                return lambda vector_r: vector_r
+            case "jacobi":
+                diagonal = matrix_diagonal(matrix_a).reshape(-1, 1)
+                assert np.all(diagonal != 0)
+                return lambda vector_r: vector_r / diagonal
+            case _:
+                raise ValueError(f"Unknown preconditioner: {preconditioner}")
+
+    @classmethod
+    def __conjugate_gradient(
+        cls,
+        dot,
+        precondition,
+        vector_b: np.ndarray[None, float],
+        epsilon: float,
+        max_iter: int,
+    ) -> (np.ndarray[float, float] | None):
+
+        vector_b_norm = np.linalg.norm(vector_b)
+        vector_x = np.zeros_like(vector_b)
+        if vector_b_norm == 0:
+            return vector_x
+
+        vector_r = vector_b.copy()
+        vector_z = precondition(vector_r)
+        vector_p = vector_z.copy()
+        rz = np.vdot(vector_r, vector_z)
+        for _ in range(max_iter):
+            if np.linalg.norm(vector_r) / vector_b_norm < epsilon:
+                return vector_x
+
+            vector_ap = dot(vector_p)
+            pap = np.vdot(vector_p, vector_ap)
+            if pap == 0:
+                return None
+            alpha = rz / pap
+
+            vector_x += alpha * vector_p
+            vector_r -= alpha * vector_ap
+
+            vector_z = precondition(vector_r)
+            rz, last_rz = np.vdot(vector_r, vector_z), rz
+            vector_p = vector_z + (rz / last_rz) * vector_p
+
+        if np.linalg.norm(vector_r) / vector_b_norm < epsilon:
+            return vector_x
+        return None
+
+    @classmethod
+    def __bicgstab(
+        cls,
+        dot,
+        precondition,
+        vector_b: np.ndarray[None, float],
+        epsilon: float,
+        max_iter: int,
+    ) -> (np.ndarray[float, float] | None):
+
+        vector_b_norm = np.linalg.norm(vector_b)
+        vector_x = np.zeros_like(vector_b)
+        if vector_b_norm == 0:
+            return vector_x
+
+        vector_r = vector_b.copy()
+        vector_r_hat = vector_r.copy()
+        vector_p = np.zeros_like(vector_b)
+        vector_v = np.zeros_like(vector_b)
+        rho = alpha = omega = 1.
+        for _ in range(max_iter):
+            if np.linalg.norm(vector_r) / vector_b_norm < epsilon:
+                return vector_x
+
+            rho, last_rho = np.vdot(vector_r_hat, vector_r), rho
+            if rho == 0 or omega == 0:
+                return None
+
+            beta = (rho / last_rho) * (alpha / omega)
+            vector_p = vector_r + beta * (vector_p - omega * vector_v)
+            vector_p_hat = precondition(vector_p)
+            vector_v = dot(vector_p_hat)
+            alpha = rho / np.vdot(vector_r_hat, vector_v)
+
+            vector_s = vector_r - alpha * vector_v
+            if np.linalg.norm(vector_s) / vector_b_norm < epsilon:
+                return vector_x + alpha * vector_p_hat
+
+            vector_s_hat = precondition(vector_s)
+            vector_t = dot(vector_s_hat)
+            omega = np.vdot(vector_t, vector_s) / np.vdot(vector_t, vector_t)
+
+            vector_x += alpha * vector_p_hat + omega * vector_s_hat
+            vector_r = vector_s - omega * vector_t
+
+        if np.linalg.norm(vector_r) / vector_b_norm < epsilon:
+            return vector_x
+        return None
+
+    @classmethod
+    def __gmres(
+        cls,
+        dot,
+        precondition,
+        vector_b: np.ndarray[None, float],
+        epsilon: float,
+        max_iter: int,
+        restart: int,
+        best_effort: bool = False,
+    ) -> (np.ndarray[float, float] | None):
+
+        # best_effort returns the last iterate even if it misses epsilon.
+        N = vector_b.shape[0]
+        vector_b_norm = np.linalg.norm(vector_b)
+        vector_x = np.zeros_like(vector_b)
+        if vector_b_norm == 0:
+            return vector_x
+
+        iterations = 0
+        while iterations < max_iter:
+            vector_r = vector_b - dot(vector_x)
+            beta = np.linalg.norm(vector_r)
+            if beta / vector_b_norm < epsilon:
+                return vector_x
+
+            # Arnoldi basis with right preconditioning; the Hessenberg
+            # matrix is kept triangular by Givens rotations, so g[j + 1] is
+            # the residual norm of the current least-squares solution.
+            m = min(restart, max_iter - iterations)
+            basis = np.zeros((N, m + 1))
+            hessenberg = np.zeros((m + 1, m))
+            cs, sn = np.zeros(m), np.zeros(m)
+            g = np.zeros(m + 1)
+            g[0] = beta
+            basis[:, 0] = vector_r[:, 0] / beta
+
+            k = 0
+            for j in range(m):
+                vector_w = dot(precondition(basis[:, j: j + 1]))[:, 0]
+                for i in range(j + 1):
+                    hessenberg[i, j] = np.vdot(vector_w, basis[:, i])
+                    vector_w -= hessenberg[i, j] * basis[:, i]
+                hessenberg[j + 1, j] = np.linalg.norm(vector_w)
+                if hessenberg[j + 1, j] != 0:
+                    basis[:, j + 1] = vector_w / hessenberg[j + 1, j]
+
+                for i in range(j):
+                    h_top, h_bottom = hessenberg[i, j], hessenberg[i + 1, j]
+                    hessenberg[i, j] = cs[i] * h_top + sn[i] * h_bottom
+                    hessenberg[i + 1, j] = -sn[i] * h_top + cs[i] * h_bottom
+                radius = np.hypot(hessenberg[j, j], hessenberg[j + 1, j])
+                if radius == 0:
+                    break
+                cs[j] = hessenberg[j, j] / radius
+                sn[j] = hessenberg[j + 1, j] / radius
+                hessenberg[j, j], hessenberg[j + 1, j] = radius, 0.
+                g[j], g[j + 1] = cs[j] * g[j], -sn[j] * g[j]
+
+                k = j + 1
+                iterations += 1
+                if abs(g[k]) / vector_b_norm < epsilon:
+                    break
+
+            if k == 0:
+                return vector_x if best_effort else None
+
+            y = np.linalg.solve(hessenberg[:k, :k], g[:k])
+            vector_x += precondition(basis[:, :k] @ y.reshape(k, 1))
+
+        if (best_effort or np.linalg.norm(vector_b - dot(vector_x)) /
+                vector_b_norm < epsilon):
+            return vector_x
+        return None
+
+
+def block_simple_iteration(
+    residual,
+    update,
+    vector_b_norms: np.ndarray[None, float],
+    tau: float,
+    epsilon: float,
+) -> np.ndarray[None, bool]:
+
+    # The simple iteration run on every column at once: each column keeps
+    # its own tau, sign flip and stop measure. residual(columns) returns
+    # those columns of A X - B and their squared norms; update(columns, R,
+    # tau) applies X -= R * tau to them. Returns which columns diverged.
+    k = vector_b_norms.shape[0]
+    tau = np.full(k, tau)
+    last_iter_measure = np.full(k, np.inf)
+    active = np.ones(k, dtype=bool)
+    failed = np.zeros(k, dtype=bool)
+
+    while active.any():
+        columns = np.flatnonzero(active)
+        vectors_r, squared_norms = residual(columns)
+        actual_iter_measure = np.sqrt(squared_norms) / vector_b_norms[columns]
+
+        done = actual_iter_measure < epsilon
+        rising = ~done & (actual_iter_measure > last_iter_measure[columns])
+        diverged = rising & (tau[columns] < 0)
+        tau[columns[rising & ~diverged]] *= -1
+
+        stepping = ~done & ~diverged
+        if stepping.any():
+            update(columns[stepping], vectors_r[:, stepping],
+                   tau[columns[stepping]])
+
+        last_iter_measure[columns] = actual_iter_measure
+        failed[columns[diverged]] = True
+        active[columns[~stepping]] = False
+
+    return failed
+
+
+def matrix_dot(
+    matrix_a: np.matrix[float, float] | CSRMatrix,
+    vector_x: np.ndarray[None, float],
+) -> np.ndarray[None, float]:
+    if isinstance(matrix_a, CSRMatrix):
+        return matrix_a @ vector_x
+    return np.dot(matrix_a, vector_x)
+
+
+def matrix_diagonal(
+    matrix_a: np.matrix[float, float] | CSRMatrix,
+) -> np.ndarray[None, float]:
+    if isinstance(matrix_a, CSRMatrix):
+        return matrix_a.diagonal()
+    return np.asarray(matrix_a).diagonal()
+
+
+def contiguous_matrix(
+    matrix_a: np.matrix[float, float] | CSRMatrix,
+) -> np.ndarray[float, float] | CSRMatrix:
+    # CSR arrays are already contiguous int64/float64 after construction;
+    # float32 matrices stay float32 for the mixed-precision solver.
+    if isinstance(matrix_a, CSRMatrix):
+        return matrix_a
+    return np.ascontiguousarray(
+        matrix_a,
+        dtype=np.float32 if matrix_a.dtype == np.float32 else np.float64)
+
+
+def open_matrix(
+    path: str,
+    shape: tuple[int, int] | None = None,
+) -> np.ndarray[float, float]:
+    # A .npy file carries its own header; any other file is read as raw
+    # C-ordered float64 of the given shape. The mapping goes to the
+    # extension as is, so each OpenMP thread pages in only its own rows.
+    if shape is None:
+        return np.load(path, mmap_mode="r")
+    return np.memmap(path, dtype=np.float64, mode="r", shape=shape)
+
 
 def openmp_matrix_dot(
-    matrix_a: np.matrix[float, float],
+    matrix_a: np.matrix[float, float] | CSRMatrix,
     vector_x: np.ndarray[None, float],
+    threads: int | None = None,
+    out: np.ndarray[None, float] | None = None,
 ) -> np.ndarray[None, float]:
-    
-    matrix_a = matrix_a.tolist()
-    vector_x = list(vector_x)
 
-    res_matrix = OpenMP_funcs.openmp_matrix_dot(matrix_a, vector_x, num_threads)
+    # Both conversions are no-ops for C-contiguous float64 arrays; the
+    # extension then reads them in place through the buffer protocol.
+    # An (N, k) vector_x holds k right-hand sides, which the extension
+    # multiplies in one pass over A. A float32 A takes float32 x and out.
+    matrix_a = contiguous_matrix(matrix_a)
+    vector_x = np.ascontiguousarray(vector_x, dtype=matrix_a.dtype)
+    if out is None:
+        out = np.empty((matrix_a.shape[0],
+                        vector_x.shape[1] if vector_x.ndim == 2 else 1),
+                       dtype=matrix_a.dtype)
+    if threads is None:
+        threads = num_threads
 
-    return np.matrix(res_matrix).transpose()
+    if not isinstance(matrix_a, CSRMatrix):
+        OpenMP_funcs.openmp_matrix_dot(
+            matrix_a, vector_x, threads, out,
+            schedule=schedule, proc_bind=proc_bind)
+        return out
 
+    # The CSR kernel takes one right-hand side at a time.
+    columns = vector_x.reshape(matrix_a.shape[1], -1)
+    result = out.reshape(matrix_a.shape[0], -1)
+    product = np.empty(matrix_a.shape[0])
+    for column in range(columns.shape[1]):
+        OpenMP_funcs.openmp_csr_matrix_dot(
+            matrix_a.indptr, matrix_a.indices, matrix_a.data,
+            np.ascontiguousarray(columns[:, column]), threads, product,
+            schedule=schedule, proc_bind=proc_bind)
+        result[:, column] = product
+
+    return out
+
+
+def main(path: str | None = None):
+    if path is not None:
+        # python sle_solver_var1.py matrix.npy
+        _matrix_a = open_matrix(path)
+        _vector_b = openmp_matrix_dot(
+            _matrix_a, np.ones((_matrix_a.shape[0], 1)))
+
+        start = time.time()
+        print(SLESolver.gmres(_matrix_a, _vector_b, preconditioner="jacobi"))
+        print(f"GMRES execute time: {time.time() - start}")
+        return
+
+    _matrix_a = np.matrix([
+        [9.,  1.,  3., -7.,  9., -0., -9.,  7.],
+        [-8., 10., -3., -0., -4.,  1.,  1., -3.],
+        [-8.,  7.,  7., -0., -0., 10., -1., -0.],
+        [7., -5.,  5.,  9.,  1.,  1., -8., -4.],
+        [3., -3.,  8., -4.,  9.,  4.,  4.,  9.],
+        [9.,  6., -9.,  7.,  3., 10., -3., -6.],
+        [4., -8.,  8.,  2., -2., -2.,  9., 10.],
+        [-4., 10.,  1., -7., -2.,  8., -8.,  5.],
+    ])
+    _vector_x = np.array([
+        [-3.],
+        [-9.],
+        [-2.],
+        [-6.],
+        [-1.],
+        [4.],
+        [-4.],
+        [5.],
+    ])
+    _vector_b = openmp_matrix_dot(_matrix_a, _vector_x)
+
+    start = time.time()
+    _res_vector_x = SLESolver.simple_iteration(
+        _matrix_a,
+        _vector_b,
+    )
+    delta_time = time.time() - start
+
+    print(_vector_x)
+    print(_res_vector_x)
+    print(f"Execute time: {delta_time}")
+
+    start = time.time()
+    _res_vector_x = SLESolver.gmres(
+        _matrix_a,
+        _vector_b,
+    )
+    delta_time = time.time() - start
+
+    print(_res_vector_x)
+    print(f"GMRES execute time: {delta_time}")
+
+    # Refinement past what float32 reaches alone: an SPD system with
+    # cond(A) = 1e3 must still come out at float64 accuracy.
+    _q, _ = np.linalg.qr(np.random.default_rng(0).standard_normal((100, 100)))
+    _matrix_spd = (_q * np.geomspace(1., 1e3, 100)) @ _q.T
+    _vector_b = _matrix_spd @ np.ones((100, 1))
+    _res_vector_x = SLESolver.mixed_precision(_matrix_spd, _vector_b)
+    assert _res_vector_x is not None
+    assert (np.linalg.norm(_matrix_spd @ _res_vector_x - _vector_b) <
+            1e-10 * np.linalg.norm(_vector_b))
+    print("Mixed precision, SPD with cond 1e3: OK")
 
-num_threads = 2
 
-_matrix_a = np.matrix([
-    [9.,  1.,  3., -7.,  9., -0., -9.,  7.],
-    [-8., 10., -3., -0., -4.,  1.,  1., -3.],
-    [-8.,  7.,  7., -0., -0., 10., -1., -0.],
-    [7., -5.,  5.,  9.,  1.,  1., -8., -4.],
-    [3., -3.,  8., -4.,  9.,  4.,  4.,  9.],
-    [9.,  6., -9.,  7.,  3., 10., -3., -6.],
-    [4., -8.,  8.,  2., -2., -2.,  9., 10.],
-    [-4., 10.,  1., -7., -2.,  8., -8.,  5.],
-])
-_vector_x = np.array([
-    [-3.],
-    [-9.],
-    [-2.],
-    [-6.],
-    [-1.],
-    [4.],
-    [-4.],
-    [5.],
-])
-_vector_b = openmp_matrix_dot(_matrix_a, _vector_x)
-
-start = time.time()
-_res_vector_x = SLESolver.simple_iteration(
-    _matrix_a,
-    _vector_b,
-)
-delta_time = time.time() - start
-
-print(_vector_x)
-print(_res_vector_x)
-print(f"Execute time: {delta_time}")
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
@@ -1,3 +1,6 @@
+import heapq
+import itertools
+import sys
 import threading
 import time
 import random
@@ -5,14 +8,70 @@ import logging
 
 from dataclasses import dataclass, field
 from enum import Enum
+
+import numpy as np
 from pandas import DataFrame
 
+from state_recorder import StateRecorder
+
+# A philosopher blocked on a fork wakes up at least this often (seconds)
+# to re-check the deadlock rule and the end of the meal.
+FORK_WAIT_TIMEOUT = 1.
+
 
 class CircleTable:
 
+    # How the philosophers avoid a deadlock:
+    #   "neighbour"     a philosopher waiting for its right fork makes the
+    #                   right neighbour put its left fork back if that one
+    #                   waits too;
+    #   "ordering"      every philosopher takes the lower-numbered fork
+    #                   first ("left" and "right" in the states then mean
+    #                   the first and the second fork);
+    #   "waiter"        at most N - 1 philosophers may reach for forks;
+    #   "chandy_misra"  forks stay with their last user and are dirty after
+    #                   a meal; a dirty fork goes clean to a neighbour who
+    #                   asks for it, a clean one is kept until its owner
+    #                   has eaten.
+    STRATEGIES = ('neighbour', 'ordering', 'waiter', 'chandy_misra')
+
     @dataclass
     class __Fork:
-        lock: threading.Lock = field(default_factory=threading.Lock)
+        number: int
+        # Waiting philosophers sleep on the condition and are woken when
+        # the owner puts the fork back, so nobody spins on a taken fork.
+        owner: 'CircleTable.__Philosopher | None' = None
+        dirty: bool = False
+        condition: threading.Condition = field(
+            default_factory=threading.Condition)
+        # Philosophers waiting for the fork in simulated time.
+        queue: list = field(default_factory=list)
+
+    @dataclass
+    class __Waiter:
+        seats: int = 0
+        condition: threading.Condition = field(
+            default_factory=threading.Condition)
+        queue: list = field(default_factory=list)
+
+    class __Simulation:
+        # Virtual clock: callbacks run in time order and ties in the order
+        # they were scheduled, so the seed alone fixes the whole run.
+
+        def __init__(self, seed):
+            self.now = 0.
+            self.random = random.Random(seed)
+            self.__events = []
+            self.__counter = itertools.count()
+
+        def schedule(self, delay, callback) -> None:
+            heapq.heappush(self.__events,
+                           (self.now + delay, next(self.__counter), callback))
+
+        def run(self, timeout) -> None:
+            while self.__events and self.__events[0][0] < timeout:
+                self.now, _, callback = heapq.heappop(self.__events)
+                callback(self)
 
     class __Philosopher:
 
@@ -24,11 +83,42 @@ class CircleTable:
             EATING = 'eating\t\t\t'
             PUTS_FORKS_IN_PLACE = 'puts forks in place\t'
 
-        def __init__(self, right_fork, left_philosopher=None):
+        # Duration range of every state (seconds) and the state after it;
+        # PUTS_LEFT_FORK is entered only through the deadlock rule.
+        __DURATIONS = {
+            __PhilosopherState.PONDERS: (1, 10),
+            __PhilosopherState.TAKES_LEFT_FORK: (2, 4),
+            __PhilosopherState.PUTS_LEFT_FORK: (1, 2),
+            __PhilosopherState.TAKES_RIGHT_FORK: (2, 4),
+            __PhilosopherState.EATING: (5, 10),
+            __PhilosopherState.PUTS_FORKS_IN_PLACE: (1, 2),
+        }
+        __NEXT_STATE = {
+            __PhilosopherState.PONDERS: __PhilosopherState.TAKES_LEFT_FORK,
+            __PhilosopherState.TAKES_LEFT_FORK:
+                __PhilosopherState.TAKES_RIGHT_FORK,
+            __PhilosopherState.PUTS_LEFT_FORK: __PhilosopherState.PONDERS,
+            __PhilosopherState.TAKES_RIGHT_FORK: __PhilosopherState.EATING,
+            __PhilosopherState.EATING: __PhilosopherState.PUTS_FORKS_IN_PLACE,
+            __PhilosopherState.PUTS_FORKS_IN_PLACE: __PhilosopherState.PONDERS,
+        }
+        __CODES = {
+            state: code for code, state in enumerate(__PhilosopherState)}
+
+        def __init__(self, right_fork, strategy, waiter,
+                     left_philosopher=None):
             right_fork: CircleTable.__Fork = right_fork
             left_philosopher: CircleTable.__Philosopher = left_philosopher
 
+            self.strategy: str = strategy
+            self.waiter: CircleTable.__Waiter = waiter
+
             self.state = self.__PhilosopherState.PONDERS
+            self.waiting = False
+            self.eating = False
+            self.seated = False
+            self.recorder: StateRecorder | None = None
+            self.clock = time.time
 
             if left_philosopher is None:
                 self.__number: int = 1
@@ -50,6 +140,136 @@ class CircleTable:
         def get_number(self) -> int:
             return self.__number
 
+        @classmethod
+        def state_names(cls) -> list[str]:
+            return [state.value.strip() for state in cls.__PhilosopherState]
+
+        @classmethod
+        def meal_codes(cls) -> tuple[int, int]:
+            # A meal is waited for from the first TAKES_LEFT_FORK after the
+            # previous meal until EATING.
+            return (cls.__CODES[cls.__PhilosopherState.TAKES_LEFT_FORK],
+                    cls.__CODES[cls.__PhilosopherState.EATING])
+
+        def start_recording(self, recorder, clock) -> None:
+            self.recorder = recorder
+            self.clock = clock
+            self.__set_state(self.state)
+
+        def __set_state(self, state) -> None:
+            # Whichever thread changes the state records it, so a change
+            # forced by a neighbour lands in the neighbour's buffer.
+            self.state = state
+            if self.recorder is not None:
+                self.recorder.record(
+                    self.clock(), self.__number, self.__CODES[state])
+
+        def __forks(self):
+            # The fork to take first and the one to take second.
+            if (self.strategy == 'ordering' and
+                    self.right_fork.number < self.left_fork.number):
+                return self.right_fork, self.left_fork
+            return self.left_fork, self.right_fork
+
+        def __try_take(self, fork) -> bool:
+            # Called with fork.condition held.
+            if fork.owner is None:
+                fork.owner = self
+                return True
+            if self.strategy != 'chandy_misra':
+                return False
+            if fork.owner is not self:
+                if not fork.dirty or fork.owner.eating:
+                    return False
+                fork.owner = self
+                fork.dirty = False
+            return True
+
+        def __start_eating(self) -> bool:
+            # Only Chandy-Misra forks can be taken away before the meal, so
+            # both are checked at once, locked in fork order.
+            forks = sorted((self.left_fork, self.right_fork),
+                           key=lambda fork: fork.number)
+            with forks[0].condition, forks[1].condition:
+                if (self.left_fork.owner is not self or
+                        self.right_fork.owner is not self):
+                    return False
+                self.eating = True
+                return True
+
+        def __release(self, fork) -> None:
+            # Called with fork.condition held. A Chandy-Misra fork stays
+            # with its owner, dirty.
+            if fork.owner is not self:
+                return
+            if self.strategy == 'chandy_misra':
+                fork.dirty = True
+            else:
+                fork.owner = None
+
+        def __take_fork(self, fork, end_time) -> bool:
+            # False if the meal is over or the left neighbour changed our
+            # state (the deadlock rule) while we were waiting.
+            state = self.state
+            while time.time() < end_time:
+                self.__break_deadlock()
+
+                with fork.condition:
+                    if self.state != state:
+                        return False
+                    if self.__try_take(fork):
+                        return True
+
+                    self.waiting = True
+                    fork.condition.wait(
+                        min(FORK_WAIT_TIMEOUT, end_time - time.time()))
+                    self.waiting = False
+            return False
+
+        def __put_fork(self, fork) -> None:
+            with fork.condition:
+                self.__release(fork)
+                fork.condition.notify_all()
+
+        def __take_seat(self, end_time) -> bool:
+            waiter = self.waiter
+            with waiter.condition:
+                while not self.seated:
+                    if waiter.seats > 0:
+                        waiter.seats -= 1
+                        self.seated = True
+                    elif time.time() < end_time:
+                        waiter.condition.wait(
+                            min(FORK_WAIT_TIMEOUT, end_time - time.time()))
+                    else:
+                        return False
+            return True
+
+        def __leave_seat(self) -> None:
+            if not self.seated:
+                return
+            with self.waiter.condition:
+                self.waiter.seats += 1
+                self.seated = False
+                self.waiter.condition.notify()
+
+        def __break_deadlock(self) -> None:
+            if (self.strategy != 'neighbour' or
+                    self.state != self.__PhilosopherState.TAKES_RIGHT_FORK):
+                return
+
+            # The right neighbour holds our right fork as its left one; if
+            # it is stuck waiting for its own right fork, it puts ours back.
+            # Alone at the table, a philosopher is its own neighbour.
+            neighbour = self.right_philosopher
+            with neighbour.right_fork.condition:
+                if ((neighbour.waiting or neighbour is self) and
+                        neighbour.state ==
+                        self.__PhilosopherState.TAKES_RIGHT_FORK):
+                    neighbour.__set_state(
+                        self.__PhilosopherState.PUTS_LEFT_FORK)
+                    neighbour.right_fork.condition.notify_all()
+
         def start_meals(self, timeout) -> None:
             end_time = time.time() + timeout
 
@@ -67,13 +287,15 @@ class CircleTable:
                             break
                         time.sleep(time_to_ponders)
 
-                        self.state = self.__PhilosopherState.TAKES_LEFT_FORK
+                        self.__set_state(
+                            self.__PhilosopherState.TAKES_LEFT_FORK)
                     case self.__PhilosopherState.TAKES_LEFT_FORK:
 
-                        if self.left_fork.lock.locked():
+                        if (self.strategy == 'waiter' and
+                                not self.__take_seat(end_time)):
+                            continue
+                        if not self.__take_fork(self.__forks()[0], end_time):
                             continue
-
-                        self.left_fork.lock.acquire()
 
                         time_to_take_left = random.uniform(2, 4)
                         logging.debug(
@@ -85,7 +307,8 @@ class CircleTable:
                             break
                         time.sleep(time_to_take_left)
 
-                        self.state = self.__PhilosopherState.TAKES_RIGHT_FORK
+                        self.__set_state(
+                            self.__PhilosopherState.TAKES_RIGHT_FORK)
                     case self.__PhilosopherState.PUTS_LEFT_FORK:
 
                         time_to_put_left = random.uniform(1, 2)
@@ -98,19 +321,19 @@ class CircleTable:
                             break
                         time.sleep(time_to_put_left)
 
-                        self.left_fork.lock.release()
+                        self.__put_fork(self.__forks()[0])
+                        self.__leave_seat()
 
-                        self.state = self.__PhilosopherState.PONDERS
+                        self.__set_state(self.__PhilosopherState.PONDERS)
                     case self.__PhilosopherState.TAKES_RIGHT_FORK:
 
-                        if self.right_fork.lock.locked():
-                            if (self.right_philosopher.state ==
-                                    self.__PhilosopherState.TAKES_RIGHT_FORK):
-                                self.right_philosopher.state = \
-                                    self.__PhilosopherState.PUTS_LEFT_FORK
+                        if not self.__take_fork(self.__forks()[1], end_time):
+                            continue
+                        if not self.__start_eating():
+                            # Chandy-Misra: the first fork was handed on.
+                            self.__set_state(
+                                self.__PhilosopherState.TAKES_LEFT_FORK)
                             continue
-
-                        self.right_fork.lock.acquire()
 
                         time_to_take_right = random.uniform(2, 4)
                         logging.debug(
@@ -122,7 +345,7 @@ class CircleTable:
                             break
                         time.sleep(time_to_take_right)
 
-                        self.state = self.__PhilosopherState.EATING
+                        self.__set_state(self.__PhilosopherState.EATING)
                     case self.__PhilosopherState.EATING:
 
                         time_to_eating = random.uniform(5, 10)
@@ -135,8 +358,8 @@ class CircleTable:
                             break
                         time.sleep(time_to_eating)
 
-                        self.state = \
-                            self.__PhilosopherState.PUTS_FORKS_IN_PLACE
+                        self.__set_state(
+                            self.__PhilosopherState.PUTS_FORKS_IN_PLACE)
                     case self.__PhilosopherState.PUTS_FORKS_IN_PLACE:
 
                         time_to_put = random.uniform(1, 2)
@@ -149,88 +372,311 @@ class CircleTable:
                             break
                         time.sleep(time_to_put)
 
-                        self.left_fork.lock.release()
-                        self.right_fork.lock.release()
+                        self.eating = False
+                        self.__put_fork(self.left_fork)
+                        self.__put_fork(self.right_fork)
+                        self.__leave_seat()
 
-                        self.state = self.__PhilosopherState.PONDERS
+                        self.__set_state(self.__PhilosopherState.PONDERS)
 
-            match self.state:
-                case (self.__PhilosopherState.PUTS_LEFT_FORK |
-                        self.__PhilosopherState.TAKES_RIGHT_FORK):
-                    self.left_fork.lock.release()
-                case (self.__PhilosopherState.EATING |
-                        self.__PhilosopherState.PUTS_FORKS_IN_PLACE):
-                    self.left_fork.lock.release()
-                    self.right_fork.lock.release()
+            self.eating = False
+            self.__put_fork(self.left_fork)
+            self.__put_fork(self.right_fork)
+            self.__leave_seat()
 
-    def __init__(self):
+        def reset(self) -> None:
+            self.state = self.__PhilosopherState.PONDERS
+            self.waiting = False
+            self.eating = False
+            self.seated = False
+            self.recorder = None
+
+            # Chandy-Misra starts with every fork dirty at the lower-numbered
+            # of its two philosophers.
+            fork = self.right_fork
+            fork.owner = None
+            fork.dirty = self.strategy == 'chandy_misra'
+            if fork.dirty:
+                fork.owner = min(self, self.right_philosopher,
+                                 key=lambda ph: ph.get_number())
+            fork.queue.clear()
+
+        def begin_activity(self, simulation) -> None:
+            # One pass of start_meals in simulated time: instead of
+            # sleeping, the end of the activity is scheduled, and a taken
+            # fork puts the philosopher in the fork's queue.
+            match self.state:
+                case self.__PhilosopherState.TAKES_LEFT_FORK:
+                    if (self.strategy == 'waiter' and
+                            not self.__queue_for_seat()):
+                        return
+                    if not self.__queue_for_fork(self.__forks()[0]):
+                        return
+                case self.__PhilosopherState.TAKES_RIGHT_FORK:
+                    if not self.__queue_for_fork(self.__forks()[1]):
+                        self.__simulate_break_deadlock(simulation)
+                        return
+                    if not self.__start_eating():
+                        self.__set_state(
+                            self.__PhilosopherState.TAKES_LEFT_FORK)
+                        self.begin_activity(simulation)
+                        return
+
+            duration = simulation.random.uniform(
+                *self.__DURATIONS[self.state])
+            logging.debug(
+                '__Philosopher\t#%d\t%s in %f seconds',
+                self.get_number(),
+                self.state.value,
+                duration)
+            simulation.schedule(duration, self.finish_activity)
+
+        def finish_activity(self, simulation) -> None:
+            match self.state:
+                case self.__PhilosopherState.PUTS_LEFT_FORK:
+                    self.__simulate_put_fork(self.__forks()[0], simulation)
+                    self.__simulate_leave_seat(simulation)
+                case self.__PhilosopherState.PUTS_FORKS_IN_PLACE:
+                    self.eating = False
+                    self.__simulate_put_fork(self.left_fork, simulation)
+                    self.__simulate_put_fork(self.right_fork, simulation)
+                    self.__simulate_leave_seat(simulation)
+
+            self.__set_state(self.__NEXT_STATE[self.state])
+            self.begin_activity(simulation)
+
+        def __queue_for_fork(self, fork) -> bool:
+            if self.__try_take(fork):
+                return True
+
+            fork.queue.append(self)
+            self.waiting = True
+            return False
+
+        def __simulate_put_fork(self, fork, simulation) -> None:
+            # Everybody queued retries at the current moment, first come
+            # first served; the losers queue up again.
+            self.__release(fork)
+            queue, fork.queue = fork.queue, []
+            for philosopher in queue:
+                philosopher.waiting = False
+                simulation.schedule(0., philosopher.begin_activity)
+
+        def __queue_for_seat(self) -> bool:
+            if self.seated:
+                return True
+            if self.waiter.seats > 0:
+                self.waiter.seats -= 1
+                self.seated = True
+                return True
+
+            self.waiter.queue.append(self)
+            return False
+
+        def __simulate_leave_seat(self, simulation) -> None:
+            if not self.seated:
+                return
+            self.waiter.seats += 1
+            self.seated = False
+            if self.waiter.queue:
+                simulation.schedule(
+                    0., self.waiter.queue.pop(0).begin_activity)
+
+        def __simulate_break_deadlock(self, simulation) -> None:
+            # The same rule as __break_deadlock; the last philosopher to
+            # close a cycle of waiters is the one that breaks it.
+            neighbour = self.right_philosopher
+            if (self.strategy == 'neighbour' and neighbour.waiting and
+                    neighbour.state ==
+                    self.__PhilosopherState.TAKES_RIGHT_FORK):
+                neighbour.right_fork.queue.remove(neighbour)
+                neighbour.waiting = False
+                neighbour.__set_state(self.__PhilosopherState.PUTS_LEFT_FORK)
+                simulation.schedule(0., neighbour.begin_activity)
+
+    def __init__(self, strategy: str = 'neighbour'):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+
+        self.__strategy = strategy
+        self.__waiter = self.__Waiter()
+        self.__count = 0
         self.__last_philosopher: CircleTable.__Philosopher | None = None
 
     def add_philosopher(self) -> None:
+        self.__count += 1
         self.__last_philosopher = self.__Philosopher(
-            self.__Fork(), self.__last_philosopher)
+            self.__Fork(self.__count), self.__strategy, self.__waiter,
+            self.__last_philosopher)
+
+    def __philosophers(self):
+        ph = self.__last_philosopher
+        while True:
+            ph = ph.right_philosopher
+            yield ph
+            if ph == self.__last_philosopher:
+                break
+
+    def __reset(self) -> None:
+        for ph in self.__philosophers():
+            ph.reset()
+        self.__waiter.seats = max(self.__count - 1, 1)
+        self.__waiter.queue.clear()
+
+    def __start_recording(self, recorder, clock) -> None:
+        recorder.states = self.__Philosopher.state_names()
+        for ph in self.__philosophers():
+            ph.start_recording(recorder, clock)
 
     def start_meals(
         self,
         timeout: int = 40,
-        log_dataframe: DataFrame | None = None
+        recorder: StateRecorder | None = None
     ) -> None:
         if self.__last_philosopher is None:
             return
 
+        self.__reset()
+        if recorder is not None:
+            start_time = time.time()
+            self.__start_recording(
+                recorder, lambda: time.time() - start_time)
+
         threads: set[threading.Thread] = set()
 
-        ph = self.__last_philosopher
-        while True:
-            ph = ph.right_philosopher
+        for ph in self.__philosophers():
             threads.add(threading.Thread(
                 target=ph.start_meals, kwargs={'timeout': timeout}))
-            if ph == self.__last_philosopher:
-                break
 
         for th in threads:
             th.start()
 
-        if log_dataframe is not None:
-            current_time = 0
+        for th in threads:
+            th.join()
 
-            while True:
-                statuses: list[str] = []
+        for ph in self.__philosophers():
+            ph.recorder = None
 
-                ph = self.__last_philosopher
-                while True:
-                    ph = ph.right_philosopher
-                    statuses.append(ph.state.value.strip())
-                    if ph == self.__last_philosopher:
-                        break
+    def simulate_meals(
+        self,
+        timeout: float = 40,
+        seed: int | None = None,
+        recorder: StateRecorder | None = None
+    ) -> None:
+        # The same meal as start_meals on a virtual clock: no threads and
+        # no sleeping, so hours of simulated time take seconds.
+        if self.__last_philosopher is None:
+            return
 
-                log_dataframe.loc[current_time] = statuses
+        simulation = self.__Simulation(seed)
+        self.__reset()
+        for ph in self.__philosophers():
+            simulation.schedule(0., ph.begin_activity)
+        if recorder is not None:
+            self.__start_recording(recorder, lambda: simulation.now)
 
-                if all(not th.is_alive() for th in threads):
-                    break
+        simulation.run(timeout)
 
-                current_time += 1
-                time.sleep(1)
+        self.__reset()
 
-        for th in threads:
-            th.join()
+    def meal_metrics(
+        self,
+        recorder: StateRecorder,
+        duration: float,
+        bins: int = 10,
+    ) -> dict:
+        # Throughput and waiting of a recorded run: meals per second,
+        # Jain's fairness index of the meal counts (1 when everybody ate
+        # equally often) and a histogram of waits per philosopher on
+        # shared bins.
+        hungry_code, eating_code = self.__Philosopher.meal_codes()
+        events = recorder.events()
+        codes = events['state'].cat.codes
+        eating = codes == eating_code
+
+        # Meals before every event: a meal and the hunger before it share
+        # the number.
+        events['meal'] = \
+            eating.groupby(events['philosopher']).cumsum() - eating
+        hungry = events[codes == hungry_code].groupby(
+            ['philosopher', 'meal'])['time'].min()
+        meals = events[eating].set_index(['philosopher', 'meal'])['time']
+        waits = (meals - hungry.reindex(meals.index)).dropna()
+
+        numbers = [ph.get_number() for ph in self.__philosophers()]
+        meal_counts = eating.groupby(events['philosopher']).sum().reindex(
+            numbers, fill_value=0).to_numpy()
+        fairness = (meal_counts.sum() ** 2 /
+                    (len(numbers) * (meal_counts ** 2).sum())
+                    if meal_counts.any() else 0.)
+
+        edges = np.histogram_bin_edges(waits.to_numpy(), bins)
+        rows = np.searchsorted(numbers, waits.index.get_level_values(0))
+        columns = np.clip(
+            np.searchsorted(edges, waits.to_numpy(), side='right') - 1,
+            0, bins - 1)
+        counts = np.zeros((len(numbers), bins), dtype=np.int64)
+        np.add.at(counts, (rows, columns), 1)
+        histograms = DataFrame(
+            counts, index=numbers,
+            columns=[f'{a:.1f}-{b:.1f}' for a, b in zip(edges, edges[1:])])
+        histograms.index.name = 'philosopher'
+
+        return {
+            'strategy': self.__strategy,
+            'meals': int(meal_counts.sum()),
+            'meals_per_second': meal_counts.sum() / duration,
+            'fairness': fairness,
+            'mean_wait': waits.mean(),
+            'max_wait': waits.max(),
+            'wait_histograms': histograms,
+        }
 
 
 if __name__ == '__main__':
+    N = 5
+
+    # python lab4.py compare [seed]: every strategy for a simulated hour
+    if sys.argv[1:2] == ['compare']:
+        summary = []
+        for strategy in CircleTable.STRATEGIES:
+            table = CircleTable(strategy)
+            for _ in range(N):
+                table.add_philosopher()
+
+            recorder = StateRecorder()
+            table.simulate_meals(
+                timeout=3600,
+                seed=int(sys.argv[2]) if len(sys.argv) > 2 else None,
+                recorder=recorder)
+            metrics = table.meal_metrics(recorder, 3600)
+
+            print(strategy)
+            print(metrics.pop('wait_histograms'))
+            summary.append(metrics)
+
+        print(DataFrame(summary).set_index('strategy'))
+        sys.exit()
+
     logging.basicConfig(level=logging.DEBUG)
 
     table = CircleTable()
 
-    N = 5
-
     for _ in range(N):
         table.add_philosopher()
 
-    log = DataFrame(columns=[f'philosopher #{i}'
-                             for i in range(1, N + 1)])
-    log.index.name = 'time_slice'
+    recorder = StateRecorder()
+
+    # python lab4.py simulate [seed]: the same 180 seconds in simulated time
+    if sys.argv[1:2] == ['simulate']:
+        table.simulate_meals(
+            timeout=180,
+            seed=int(sys.argv[2]) if len(sys.argv) > 2 else None,
+            recorder=recorder)
+    else:
+        table.start_meals(timeout=180, recorder=recorder)
 
-    table.start_meals(timeout=180, log_dataframe=log)
+    log = recorder.time_slices(end=180)
 
     print(log)
     log.to_excel("lab4/lad4.log.xlsx")
@@ -0,0 +1,110 @@
+import threading
+from array import array
+
+import numpy as np
+from pandas import Categorical, DataFrame
+
+
+class StateRecorder:
+    # Every state change as (time, philosopher, state code) appended to
+    # compact typed arrays. Each thread writes its own set of arrays, so
+    # recording takes no lock; everything is converted to a DataFrame in
+    # bulk after the run.
+
+    def __init__(self):
+        self.states: list[str] = []
+        self.__local = threading.local()
+        self.__buffers: list[tuple[array, array, array]] = []
+        self.__lock = threading.Lock()
+
+    def record(self, time: float, philosopher: int, code: int) -> None:
+        try:
+            times, philosophers, codes = self.__local.buffer
+        except AttributeError:
+            times, philosophers, codes = self.__new_buffer()
+        times.append(time)
+        philosophers.append(philosopher)
+        codes.append(code)
+
+    def __new_buffer(self) -> tuple[array, array, array]:
+        buffer = (array('d'), array('i'), array('b'))
+        self.__local.buffer = buffer
+        with self.__lock:
+            self.__buffers.append(buffer)
+        return buffer
+
+    def __columns(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        with self.__lock:
+            buffers = list(self.__buffers)
+
+        # Threads may still be appending: np.frombuffer on a live array
+        # would hold an export that makes its next append fail, so every
+        # array is sliced (copied) first, all three cut to the length of
+        # the shortest in case a thread is between its appends.
+        columns = ([np.empty(0)], [np.empty(0, dtype=np.int32)],
+                   [np.empty(0, dtype=np.int8)])
+        for times, philosophers, codes in buffers:
+            length = min(len(times), len(philosophers), len(codes))
+            columns[0].append(np.frombuffer(times[:length],
+                                            dtype=np.float64))
+            columns[1].append(np.frombuffer(philosophers[:length],
+                                            dtype=np.int32))
+            columns[2].append(np.frombuffer(codes[:length], dtype=np.int8))
+        times, philosophers, codes = \
+            (np.concatenate(column) for column in columns)
+
+        # Stable, so changes made at the same moment keep their order.
+        order = np.argsort(times, kind='stable')
+        return times[order], philosophers[order], codes[order]
+
+    def events(self) -> DataFrame:
+        times, philosophers, codes = self.__columns()
+        return DataFrame({
+            'time': times,
+            'philosopher': philosophers,
+            'state': Categorical.from_codes(codes, self.states),
+        })
+
+    def time_slices(
+        self,
+        step: float = 1.,
+        end: float | None = None,
+    ) -> DataFrame:
+        # The state of every philosopher at 0, step, 2 * step, ..., the
+        # layout of the old per-second log.
+        times, philosophers, codes = self.__columns()
+        if end is None:
+            end = times[-1] if times.shape[0] else 0.
+        slices = np.arange(0., end + step / 2, step)
+
+        # Grouped by philosopher, still in time order inside every group.
+        order = np.argsort(philosophers, kind='stable')
+        times, philosophers, codes = \
+            times[order], philosophers[order], codes[order]
+        numbers, starts = np.unique(philosophers, return_index=True)
+        ends = np.append(starts[1:], philosophers.shape[0])
+
+        columns = {}
+        for philosopher, start, stop in zip(numbers, starts, ends):
+            last = np.searchsorted(
+                times[start:stop], slices, side='right') - 1
+            slice_codes = np.where(last >= 0, codes[start:stop][last], -1)
+            columns[f'philosopher #{philosopher}'] = \
+                Categorical.from_codes(slice_codes, self.states)
+
+        log = DataFrame(columns, index=slices)
+        log.index.name = 'time_slice'
+        return log
+
+    def to_file(self, path: str, step: float | None = None) -> None:
+        # All events, or the time slices if a step is given.
+        log = self.events() if step is None else self.time_slices(step)
+        match path.rsplit('.', 1)[-1]:
+            case 'csv':
+                log.to_csv(path)
+            case 'parquet':
+                log.to_parquet(path)
+            case 'xlsx':
+                log.to_excel(path)
+            case extension:
+                raise ValueError(f"Unknown file type: {extension}")